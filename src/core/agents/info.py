@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any, Literal
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentInfo:
     """Agent 配置信息
     
@@ -3,7 +3,7 @@
 当前版本暂不支持从 .creative-agent/config.json 加载 agents 配置（保持硬编码，与 opencode 行为一致）。
 """
 
-from typing import Dict, List, Optional, Literal
+from typing import Dict, List, Optional, Literal, Tuple
 
 from .info import AgentInfo
 from .prompts import (
@@ -39,6 +39,11 @@ class AgentRegistry:
             return
         
         self._agents: Dict[str, AgentInfo] = {}
+        # list_agents 的过滤结果缓存，注册/移除 agent 时失效
+        self._list_cache: Dict[Tuple[Optional[str], bool], List[AgentInfo]] = {}
+        # describe_agents / list_agent_names 的结果缓存，与 _list_cache 同时失效
+        self._description_cache: Dict[Optional[str], str] = {}
+        self._names_cache: Dict[Optional[str], Tuple[str, ...]] = {}
         self._initialized = True
         
         # 注册内置 agents
@@ -128,6 +133,9 @@ class AgentRegistry:
             logger.info(f"覆盖 agent: {agent.name}")
         
         self._agents[agent.name] = agent
+        self._list_cache.clear()
+        self._description_cache.clear()
+        self._names_cache.clear()
         logger.debug(f"注册 agent: {agent.name} (mode={agent.mode}, native={agent.native})")
     
     def get(self, name: str) -> Optional[AgentInfo]:
@@ -153,17 +161,52 @@ class AgentRegistry:
             include_hidden: 是否包含隐藏的 agents
             
         Returns:
-            AgentInfo 列表
+            AgentInfo 列表（共享缓存，调用方不应修改）
         """
-        agents = list(self._agents.values())
+        key = (mode, include_hidden)
+        cached = self._list_cache.get(key)
+        if cached is not None:
+            return cached
         
-        if mode:
-            agents = [a for a in agents if a.mode == mode]
+        agents = [
+            a for a in self._agents.values()
+            if (not mode or a.mode == mode) and (include_hidden or not a.hidden)
+        ]
+        self._list_cache[key] = agents
+        return agents
+    
+    def list_agent_names(self, mode: Optional[Literal["primary", "subagent"]] = None) -> Tuple[str, ...]:
+        """获取可见 agents 的名称
         
-        if not include_hidden:
-            agents = [a for a in agents if not a.hidden]
+        Args:
+            mode: 过滤模式（primary 或 subagent）
+            
+        Returns:
+            名称元组（缓存，注册/移除 agent 后重新生成）
+        """
+        names = self._names_cache.get(mode)
+        if names is None:
+            names = tuple(agent.name for agent in self.list_agents(mode=mode))
+            self._names_cache[mode] = names
+        return names
+    
+    def describe_agents(self, mode: Optional[Literal["primary", "subagent"]] = None) -> str:
+        """生成可见 agents 的说明文本，每行 "- 名称: 描述"
         
-        return agents
+        Args:
+            mode: 过滤模式（primary 或 subagent）
+            
+        Returns:
+            说明文本（缓存，注册/移除 agent 后重新生成）
+        """
+        description = self._description_cache.get(mode)
+        if description is None:
+            description = "\n".join(
+                f"- {agent.name}: {agent.description}"
+                for agent in self.list_agents(mode=mode)
+            )
+            self._description_cache[mode] = description
+        return description
     
     def exists(self, name: str) -> bool:
         """检查 agent 是否存在
@@ -194,6 +237,9 @@ class AgentRegistry:
             return False
         
         del self._agents[name]
+        self._list_cache.clear()
+        self._description_cache.clear()
+        self._names_cache.clear()
         logger.info(f"移除 agent: {name}")
         return True
     
@@ -45,6 +45,7 @@ class Config(BaseSettings):
     # 安全策略
     approval_policy: Literal["always", "on_request", "never"] = Field(default="on_request")
     sandbox_policy: Literal["strict", "workspace_write", "none"] = Field(default="workspace_write")
+    max_concurrent_sandbox: int = Field(default=8, ge=1, description="沙箱中同时运行的命令数上限")
     
     # 系统提示
     base_instructions: str = Field(
@@ -83,6 +84,9 @@ class Config(BaseSettings):
     compaction_protect_turns: int = Field(default=2, ge=0, le=10, description="压缩时保护最近对话轮数")
     compaction_auto_threshold: float = Field(default=0.75, ge=0.1, le=1.0, description="自动压缩触发阈值")
     
+    # 补丁
+    patch_shell_threshold: int = Field(default=100 * 1024, ge=0, description="超过该大小（字节）的文件使用系统patch命令应用补丁")
+    
     # 日志
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = Field(default="INFO")
     
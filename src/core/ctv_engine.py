@@ -40,6 +40,8 @@ class CtvEngine:
         
         if self.session:
             await self.session.stop()
+            # 关闭工具持有的连接（如 webfetch 的 HTTP 会话），避免退出时留下未关闭的会话
+            await self.session.tool_registry.close()
             self.session = None
     
     async def submit_user_input(self, text: str, cwd: Optional[Path] = None) -> str:
@@ -283,11 +283,11 @@ class ModelClient:
             total_tokens=usage.total_tokens
         )
 
-        logger.debug(f"模型响应内容: {message.content}")
-        logger.debug(f"推理内容: {reasoning_content}")
-        logger.debug(f"工具调用: {tool_calls}")
-        logger.debug(f"Token使用情况: {token_usage}")
-        logger.debug(f"完成原因: {choice.finish_reason}")
+        logger.debug("模型响应内容: %s", message.content)
+        logger.debug("推理内容: %s", reasoning_content)
+        logger.debug("工具调用: %s", tool_calls)
+        logger.debug("Token使用情况: %s", token_usage)
+        logger.debug("完成原因: %s", choice.finish_reason)
         
         return ChatResponse(
             content=message.content or "",
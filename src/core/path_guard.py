@@ -1,14 +1,25 @@
+import os
+import stat
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Optional, Tuple, Any
 
 
+def _path_key(path: Path) -> Tuple[str, ...]:
+    if os.name == "nt":
+        return tuple(os.path.normcase(part) for part in path.parts)
+    return path.parts
+
+
 def _is_relative_to(path: Path, root: Path) -> bool:
-    try:
-        path.relative_to(root)
-        return True
-    except ValueError:
-        return False
+    """Check whether path equals root or lies beneath it.
+
+    Both paths are expected to be normalized already; the check is a prefix
+    comparison of their parts (case-folded on Windows), which avoids the
+    ValueError raised by Path.relative_to on every miss.
+    """
+    root_key = _path_key(root)
+    return _path_key(path)[:len(root_key)] == root_key
 
 
 def _normalize_path(path: Path) -> Path:
@@ -101,9 +112,37 @@ def policy_from_context(context: Optional[Any], cwd: Optional[Path] = None) -> P
     return build_path_policy(config, cwd=cwd)
 
 
+def resolve_search_path(policy: PathPolicy, search_path: str) -> str:
+    """Resolve a search path to an absolute path.
+
+    Relative paths are joined to the current directory when it lies inside the
+    workspace, otherwise to the workspace root.
+    """
+    if os.path.isabs(search_path):
+        return search_path
+    base_dir = Path(os.getcwd()).resolve()
+    if not _is_relative_to(base_dir, policy.workspace_root):
+        base_dir = policy.workspace_root
+    return os.path.abspath(os.path.join(str(base_dir), search_path))
+
+
+def stat_dir(path: str) -> os.stat_result:
+    """Stat a directory with a single syscall.
+
+    Raises FileNotFoundError (or another OSError) when the path cannot be
+    stat'ed, and NotADirectoryError when it is not a directory.
+    """
+    st = os.stat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise NotADirectoryError(path)
+    return st
+
+
 def _is_under_any(path: Path, roots: Iterable[Path]) -> bool:
+    key = _path_key(path)
     for root in roots:
-        if path == root or _is_relative_to(path, root):
+        root_key = _path_key(root)
+        if key[:len(root_key)] == root_key:
             return True
     return False
 
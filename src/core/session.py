@@ -193,6 +193,7 @@ class Session:
         
         释放会话占用的所有资源，包括：
         - 关闭模型客户端连接
+        - 关闭工具持有的连接
         - 刷新记忆系统（如果启用）
         """
         logger.info(f"清理 Session 资源: {self.session_id}")
@@ -204,7 +205,14 @@ class Session:
             except Exception as e:
                 logger.warning(f"关闭模型客户端失败: {e}")
         
-        # 2. 刷新记忆管理器（仅主 Session）
+        # 2. 关闭工具持有的连接（如 webfetch 的 HTTP 会话）
+        if self.tool_registry:
+            try:
+                await self.tool_registry.close()
+            except Exception as e:
+                logger.warning(f"关闭工具资源失败: {e}")
+        
+        # 3. 刷新记忆管理器（仅主 Session）
         if self.memory_manager and not self.is_subagent_session:
             try:
                 await self.memory_manager.flush()
@@ -5,7 +5,7 @@ from .file_tools import ReadTool, WriteTool
 from .edit_tool import EditTool
 from .multi_edit_tool import MultiEditTool
 from .task_tool import TaskTool
-from .task_manager import TaskManager, SubagentSession
+from .task_manager import TaskManager, SubagentSession, get_task_manager
 from .web_tools import WebFetchTool, WebSearchTool
 from .registry import ToolRegistry, ToolInfo, get_global_registry, reset_global_registry
 
@@ -30,6 +30,7 @@ __all__ = [
     'TaskTool',
     'TaskManager',
     'SubagentSession',
+    'get_task_manager',
     'WebFetchTool',
     'WebSearchTool',
     'ToolRegistry',
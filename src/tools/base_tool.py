@@ -28,6 +28,10 @@ T = TypeVar('T')
 class BaseTool(ABC, Generic[T]):
     """基础工具抽象类"""
     
+    # 名称、描述和参数模式是否只由类决定；为True时注册表按类缓存这些信息，
+    # 重复注册无需再创建实例。描述依赖运行时状态的工具应设为False
+    CACHE_TOOL_INFO: bool = True
+    
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
@@ -1,6 +1,8 @@
 import os
 import re
-from typing import Dict, List, Any, Optional, Generator
+import stat
+import tempfile
+from typing import Dict, List, Any, Optional, Generator, Tuple
 from difflib import unified_diff
 from pathlib import Path
 from .base_tool import BaseTool, ToolContext, ToolResult
@@ -237,8 +239,11 @@ class EditTool(BaseTool[Dict[str, Any]]):
                 
                 yield content[match_start:match_end]
     
-    def _replace_content(self, content: str, old_string: str, new_string: str, replace_all: bool = False) -> str:
-        """执行内容替换"""
+    def apply_edit(self, content: str, old_string: str, new_string: str, replace_all: bool = False) -> str:
+        """对内存中的内容执行一次替换并返回新内容，不读写文件
+        
+        找不到oldString或匹配不唯一时抛出ValueError。
+        """
         if old_string == new_string:
             raise ValueError("oldString 和 newString 必须不同")
         
@@ -270,6 +275,40 @@ class EditTool(BaseTool[Dict[str, Any]]):
         
         raise ValueError("在内容中未找到 oldString 或找到多个匹配项")
     
+    def _resolve_path(self, file_path: str, context: ToolContext) -> Tuple[str, bool, str]:
+        """转换为绝对路径并做写入访问检查，返回 (绝对路径, 是否允许, 拒绝原因)"""
+        policy = policy_from_context(context)
+        if not os.path.isabs(file_path):
+            file_path = str(policy.workspace_root / file_path)
+        else:
+            file_path = os.path.abspath(file_path)
+        allowed, reason = check_path_access(policy, Path(file_path), "write")
+        return file_path, allowed, reason
+    
+    def _write_file(self, file_path: str, content: str) -> None:
+        """写入文件；覆盖已有文件时先写临时文件再os.replace，避免留下写了一半的内容"""
+        # 符号链接需写入其指向的文件，否则os.replace会用普通文件替换掉链接本身
+        file_path = os.path.realpath(file_path)
+        try:
+            mode = stat.S_IMODE(os.stat(file_path).st_mode)
+        except FileNotFoundError:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            return
+        
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix=".edit-")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    
     def _generate_diff(self, file_path: str, old_content: str, new_content: str) -> str:
         """生成差异报告"""
         old_lines = old_content.splitlines(keepends=True)
@@ -307,17 +346,8 @@ class EditTool(BaseTool[Dict[str, Any]]):
                 metadata={"error": "identical_strings"}
             )
         
-        # 访问控制策略
-        policy = policy_from_context(context)
-
-        # 转换为绝对路径
-        if not os.path.isabs(file_path):
-            file_path = str(policy.workspace_root / file_path)
-        else:
-            file_path = os.path.abspath(file_path)
-
-        # 访问控制检查（写入）
-        allowed, reason = check_path_access(policy, Path(file_path), "write")
+        # 转换为绝对路径并做访问控制检查（写入）
+        file_path, allowed, reason = self._resolve_path(file_path, context)
         if not allowed:
             return ToolResult(
                 title=f"写入被拒绝: {os.path.basename(file_path)}",
@@ -370,7 +400,7 @@ class EditTool(BaseTool[Dict[str, Any]]):
             
             # 执行替换
             try:
-                new_content = self._replace_content(old_content, old_string, new_string, replace_all)
+                new_content = self.apply_edit(old_content, old_string, new_string, replace_all)
             except ValueError as e:
                 return ToolResult(
                     title=f"编辑失败: {os.path.basename(file_path)}",
@@ -383,8 +413,7 @@ class EditTool(BaseTool[Dict[str, Any]]):
                 )
             
             # 写入新内容
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            self._write_file(file_path, new_content)
             
             # 生成差异报告
             diff = self._generate_diff(file_path, old_content, new_content)
@@ -1,6 +1,7 @@
 import os
+import time
 import mimetypes
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from .base_tool import BaseTool, ToolContext, ToolResult
 from core.path_guard import policy_from_context, check_path_access
@@ -9,6 +10,8 @@ from core.path_guard import policy_from_context, check_path_access
 # 常量配置
 DEFAULT_READ_LIMIT = 2000
 MAX_LINE_LENGTH = 2000
+SUGGESTION_SCAN_LIMIT = 5000
+SUGGESTION_CACHE_TTL = 5.0
 
 
 class ReadTool(BaseTool[Dict[str, Any]]):
@@ -29,6 +32,7 @@ class ReadTool(BaseTool[Dict[str, Any]]):
 - 如果您读取的文件存在但内容为空，您将收到系统提醒警告而不是文件内容"""
         
         super().__init__("read", description)
+        self._suggestion_cache: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
     
     def get_parameters_schema(self) -> Dict[str, Any]:
         """获取参数模式定义"""
@@ -70,9 +74,8 @@ class ReadTool(BaseTool[Dict[str, Any]]):
         }
         return image_extensions.get(ext)
     
-    def _is_binary_file(self, file_path: str) -> bool:
-        """检查是否为二进制文件"""
-        # 首先检查扩展名
+    def _has_binary_extension(self, file_path: str) -> bool:
+        """根据扩展名判断是否为二进制文件"""
         ext = Path(file_path).suffix.lower()
         binary_extensions = {
             '.zip', '.tar', '.gz', '.exe', '.dll', '.so', '.class', '.jar', 
@@ -80,53 +83,74 @@ class ReadTool(BaseTool[Dict[str, Any]]):
             '.odt', '.ods', '.odp', '.bin', '.dat', '.obj', '.o', '.a', 
             '.lib', '.wasm', '.pyc', '.pyo', '.pdf'
         }
+        return ext in binary_extensions
+    
+    def _is_binary_content(self, chunk: bytes) -> bool:
+        """根据文件头部内容判断是否为二进制文件"""
+        if not chunk:
+            return False
         
-        if ext in binary_extensions:
+        # 检查是否包含空字节
+        if b'\x00' in chunk:
             return True
         
-        # 检查文件内容
-        try:
-            with open(file_path, 'rb') as f:
-                chunk = f.read(4096)
-                if not chunk:
-                    return False
-                
-                # 检查是否包含空字节
-                if b'\x00' in chunk:
-                    return True
-                
-                # 计算非打印字符的比例
-                non_printable = 0
-                for byte in chunk:
-                    if byte < 9 or (13 < byte < 32):
-                        non_printable += 1
-                
-                # 如果超过30%是非打印字符，认为是二进制文件
-                return non_printable / len(chunk) > 0.3
-                
-        except (IOError, OSError):
-            return False
+        # 计算非打印字符的比例
+        non_printable = 0
+        for byte in chunk:
+            if byte < 9 or (13 < byte < 32):
+                non_printable += 1
+        
+        # 如果超过30%是非打印字符，认为是二进制文件
+        return non_printable / len(chunk) > 0.3
+    
+    def _binary_file_result(self, file_path: str) -> ToolResult:
+        """构建二进制文件的拒绝结果"""
+        return ToolResult(
+            title=f"无法读取二进制文件: {os.path.basename(file_path)}",
+            output=f"无法读取二进制文件: {file_path}",
+            metadata={
+                "error": "binary_file",
+                "file_path": file_path
+            }
+        )
     
     def _get_file_suggestions(self, file_path: str) -> List[str]:
-        """获取文件建议"""
+        """获取文件建议（短时缓存，避免反复扫描同一目录）"""
+        directory = os.path.dirname(file_path)
+        filename = os.path.basename(file_path).lower()
+        key = (directory, filename)
+        now = time.monotonic()
+        
+        cached = self._suggestion_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return list(cached[1])
+        
+        suggestions = self._scan_file_suggestions(directory, filename)
+        
+        # 顺带清理过期条目，保持缓存有界
+        self._suggestion_cache = {
+            k: v for k, v in self._suggestion_cache.items() if v[0] > now
+        }
+        self._suggestion_cache[key] = (now + SUGGESTION_CACHE_TTL, suggestions)
+        return list(suggestions)
+    
+    def _scan_file_suggestions(self, directory: str, filename: str) -> List[str]:
+        """扫描目录查找相似文件名，最多检查 SUGGESTION_SCAN_LIMIT 个条目"""
+        suggestions = []
         try:
-            directory = os.path.dirname(file_path)
-            filename = os.path.basename(file_path).lower()
-            
-            if not os.path.exists(directory):
-                return []
-            
-            suggestions = []
-            for entry in os.listdir(directory):
-                entry_lower = entry.lower()
-                if (filename in entry_lower or entry_lower in filename):
-                    suggestions.append(os.path.join(directory, entry))
-                    if len(suggestions) >= 3:
+            with os.scandir(directory) as it:
+                for i, entry in enumerate(it):
+                    if i >= SUGGESTION_SCAN_LIMIT:
                         break
-            
-            return suggestions
+                    entry_lower = entry.name.lower()
+                    if (filename in entry_lower or entry_lower in filename):
+                        suggestions.append(os.path.join(directory, entry.name))
+                        if len(suggestions) >= 3:
+                            break
         except (OSError, IOError):
             return []
+        
+        return suggestions
     
     async def execute(self, params: Dict[str, Any], context: ToolContext) -> ToolResult:
         """执行文件读取"""
@@ -152,8 +176,10 @@ class ReadTool(BaseTool[Dict[str, Any]]):
                 metadata={"error": "access_denied", "file_path": file_path}
             )
 
-        # 检查文件是否存在
-        if not os.path.exists(file_path):
+        # 一次 stat 同时完成存在性检查并获取文件大小
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
             suggestions = self._get_file_suggestions(file_path)
             error_msg = f"文件未找到: {file_path}"
             
@@ -169,6 +195,16 @@ class ReadTool(BaseTool[Dict[str, Any]]):
                     "suggestions": suggestions
                 }
             )
+        except OSError as e:
+            return ToolResult(
+                title=f"读取错误: {os.path.basename(file_path)}",
+                output=f"读取文件时发生错误: {str(e)}",
+                metadata={
+                    "error": "io_error",
+                    "file_path": file_path,
+                    "error_message": str(e)
+                }
+            )
         
         # 检查是否为图像文件
         image_type = self._is_image_file(file_path)
@@ -183,24 +219,34 @@ class ReadTool(BaseTool[Dict[str, Any]]):
                 }
             )
         
-        # 检查是否为二进制文件
-        if self._is_binary_file(file_path):
-            return ToolResult(
-                title=f"无法读取二进制文件: {os.path.basename(file_path)}",
-                output=f"无法读取二进制文件: {file_path}",
-                metadata={
-                    "error": "binary_file",
-                    "file_path": file_path
-                }
-            )
+        # 检查是否为二进制文件（扩展名）
+        if self._has_binary_extension(file_path):
+            return self._binary_file_result(file_path)
         
-        # 读取文件内容
+        # 读取文件内容：只打开一次，按 stat 得到的大小一次性分配缓冲区，
+        # 头部 4KB 既用于二进制嗅探也直接作为内容的一部分
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                lines = f.readlines()
+            buf = bytearray(st.st_size)
+            view = memoryview(buf)
+            with open(file_path, 'rb') as f:
+                n = f.readinto(view[:4096])
+                if self._is_binary_content(buf[:n]):
+                    return self._binary_file_result(file_path)
+                while n < st.st_size:
+                    count = f.readinto(view[n:])
+                    if not count:
+                        break
+                    n += count
+                # stat 之后文件可能被追加
+                tail = f.read() if n == st.st_size else b""
             
-            # 去除行末的换行符
-            lines = [line.rstrip('\n\r') for line in lines]
+            text = str(view[:n], 'utf-8', 'replace')
+            if tail:
+                text += tail.decode('utf-8', errors='replace')
+            # 与文本模式的通用换行一致，并去除行末的换行符
+            lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+            if lines[-1] == '':
+                lines.pop()
             
             # 应用偏移和限制
             total_lines = len(lines)
@@ -214,14 +260,16 @@ class ReadTool(BaseTool[Dict[str, Any]]):
                 else:
                     truncated_lines.append(line)
             
-            # 构建输出（纯净内容，无行号）
-            output = "<file>\n"
-            output += "\n".join(truncated_lines)
+            # 构建输出（纯净内容，无行号），一次 join 生成最终字符串
+            parts = ["<file>"]
+            parts.extend(truncated_lines or [""])
             
             if total_lines > offset + len(selected_lines):
-                output += f"\n\n(文件还有更多行。使用 'offset' 参数读取第 {offset + len(selected_lines)} 行之后的内容)"
+                parts.append("")
+                parts.append(f"(文件还有更多行。使用 'offset' 参数读取第 {offset + len(selected_lines)} 行之后的内容)")
             
-            output += "\n</file>"
+            parts.append("</file>")
+            output = "\n".join(parts)
             
             # 生成预览（前20行）
             preview_lines = truncated_lines[:20]
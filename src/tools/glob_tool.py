@@ -1,10 +1,45 @@
 import os
-import glob
+import re
 import fnmatch
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Any, Optional
 from pathlib import Path
 from .base_tool import BaseTool, ToolContext, ToolResult
-from core.path_guard import policy_from_context, check_path_access
+from core.path_guard import policy_from_context, check_path_access, resolve_search_path, stat_dir
+
+
+def _has_magic(segment: str) -> bool:
+    """判断路径段是否包含通配符"""
+    return any(ch in segment for ch in '*?[')
+
+
+def _compile_name_matcher(segment: str) -> Callable[[bytes], bool]:
+    """将通配段编译为匹配bytes文件名的函数
+    
+    ASCII文件名直接用bytes正则匹配，免去解码；非ASCII文件名解码后匹配，
+    保证?和[seq]按字符而非字节计数。
+    """
+    translated = fnmatch.translate(segment)
+    str_match = re.compile(translated).match
+    if not segment.isascii():
+        return lambda name: str_match(os.fsdecode(name)) is not None
+    bytes_match = re.compile(translated.encode()).match
+    return lambda name: (
+        bytes_match(name) if name.isascii() else str_match(os.fsdecode(name))
+    ) is not None
+
+
+def _links_to_ancestor(entry: os.DirEntry, ancestors: Optional[tuple]) -> bool:
+    """判断指向目录的符号链接是否指回祖先链中的某个目录（跟随会形成循环）"""
+    try:
+        st = entry.stat()
+    except OSError:
+        return True
+    key = (st.st_dev, st.st_ino)
+    while ancestors is not None:
+        if ancestors[0] == key:
+            return True
+        ancestors = ancestors[1]
+    return False
 
 
 class GlobTool(BaseTool[Dict[str, Any]]):
@@ -65,58 +100,128 @@ class GlobTool(BaseTool[Dict[str, Any]]):
     
     def _expand_braces(self, pattern: str) -> List[str]:
         """展开大括号模式，如{a,b}变成[a, b]"""
-        if '{' not in pattern or '}' not in pattern:
-            return [pattern]
-        
-        patterns = []
-        start = pattern.find('{')
-        end = pattern.find('}', start)
-        
-        if start == -1 or end == -1:
-            return [pattern]
-        
-        prefix = pattern[:start]
-        suffix = pattern[end + 1:]
-        options = pattern[start + 1:end].split(',')
-        
-        for option in options:
-            new_pattern = prefix + option.strip() + suffix
-            # 递归处理可能存在的嵌套大括号
-            patterns.extend(self._expand_braces(new_pattern))
-        
-        return patterns
+        return list(self._iter_braces(pattern))
     
-    def _glob_recursive(self, pattern: str, root_path: str) -> List[str]:
-        """递归glob搜索"""
+    def _iter_braces(self, pattern: str) -> Iterator[str]:
+        """惰性展开大括号模式，按顺序逐个产出展开结果"""
+        stack = [pattern]
+        while stack:
+            current = stack.pop()
+            start = current.find('{')
+            end = current.find('}', start) if start != -1 else -1
+            if end == -1:
+                yield current
+                continue
+            
+            prefix = current[:start]
+            suffix = current[end + 1:]
+            options = current[start + 1:end].split(',')
+            # 逆序入栈以保持展开顺序，剩余的大括号在出栈时继续展开
+            stack.extend(prefix + option.strip() + suffix for option in reversed(options))
+    
+    def _glob_recursive(self, pattern: str, root_path: str) -> List[bytes]:
+        """递归glob搜索，返回bytes路径，仅在输出时解码"""
+        root = os.fsencode(os.path.abspath(root_path))
         matches = []
+        seen = set()
         
-        # 展开大括号模式
-        patterns = self._expand_braces(pattern)
-        
-        for pat in patterns:
+        # 惰性展开大括号模式，展开一个就搜索一个
+        for pat in self._iter_braces(pattern):
             # 如果模式不以**/开头，自动添加以启用递归搜索
             if not pat.startswith('**/') and not os.path.isabs(pat):
                 pat = '**/' + pat
             
-            # 使用glob进行匹配
-            full_pattern = os.path.join(root_path, pat)
             try:
-                found = glob.glob(full_pattern, recursive=True)
-                matches.extend(found)
+                found = list(self._scandir_glob(pat, root))
             except Exception:
-                # 如果glob失败，尝试手动递归搜索
-                matches.extend(self._manual_recursive_search(pat, root_path))
+                # 如果遍历失败，尝试手动递归搜索
+                found = [os.fsencode(m) for m in self._manual_recursive_search(pat, root_path)]
+            
+            # 同一模式内遍历不会重复，只需对多个展开模式之间去重
+            for match in found:
+                if match not in seen:
+                    seen.add(match)
+                    matches.append(match)
         
-        # 去重并过滤
-        unique_matches = []
-        seen = set()
-        for match in matches:
-            abs_match = os.path.abspath(match)
-            if abs_match not in seen and os.path.isfile(abs_match):
-                unique_matches.append(abs_match)
-                seen.add(abs_match)
+        return matches
+    
+    def _scandir_glob(self, pattern: str, root_path: bytes) -> Iterator[bytes]:
+        """基于os.scandir的glob遍历，只产出文件路径
+        
+        语义与glob.glob(recursive=True)一致：通配段不匹配隐藏文件，
+        ** 不进入隐藏目录，会进入指向目录的符号链接；文件类型直接取自DirEntry缓存。
+        ** 展开时按(st_dev, st_ino)记录当前路径上的祖先目录，跳过指回祖先的
+        符号链接，避免循环。全程使用bytes路径，避免对每个目录项做UTF-8解码。
+        """
+        if os.path.isabs(pattern):
+            root_path = os.fsencode(os.sep)
+        segments = [seg for seg in pattern.split('/') if seg]
+        if not segments:
+            return
+        last = len(segments) - 1
+        matchers = [
+            _compile_name_matcher(seg) if seg != '**' and _has_magic(seg) else None
+            for seg in segments
+        ]
         
-        return unique_matches
+        # 栈中保存 (目录, 模式段下标, 祖先目录链)；祖先链为 ((st_dev, st_ino), 上一级链) 的嵌套元组
+        stack = [(root_path, 0, None)]
+        visited = set()
+        while stack:
+            directory, index, ancestors = stack.pop()
+            if (directory, index) in visited:
+                continue
+            visited.add((directory, index))
+            segment = segments[index]
+            
+            if segment == '**':
+                try:
+                    st = os.stat(directory)
+                except OSError:
+                    continue
+                ancestors = ((st.st_dev, st.st_ino), ancestors)
+                # ** 匹配零层目录
+                if index < last:
+                    stack.append((directory, index + 1, ancestors))
+                try:
+                    with os.scandir(directory) as it:
+                        for entry in it:
+                            if entry.name.startswith(b'.'):
+                                continue
+                            if entry.is_dir():
+                                if not (entry.is_symlink() and _links_to_ancestor(entry, ancestors)):
+                                    stack.append((entry.path, index, ancestors))
+                            elif index == last and entry.is_file():
+                                yield entry.path
+                except OSError:
+                    continue
+                continue
+            
+            matcher = matchers[index]
+            if matcher is None:
+                # 字面量段直接拼接路径，无需列目录
+                path = os.path.normpath(os.path.join(directory, os.fsencode(segment)))
+                if index == last:
+                    if os.path.isfile(path):
+                        yield path
+                elif os.path.isdir(path):
+                    stack.append((path, index + 1, ancestors))
+                continue
+            
+            include_hidden = segment.startswith('.')
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        name = entry.name
+                        if (name.startswith(b'.') and not include_hidden) or not matcher(name):
+                            continue
+                        if index == last:
+                            if entry.is_file():
+                                yield entry.path
+                        elif entry.is_dir():
+                            stack.append((entry.path, index + 1, ancestors))
+            except OSError:
+                continue
     
     def _manual_recursive_search(self, pattern: str, root_path: str) -> List[str]:
         """手动递归搜索（当glob失败时的后备方案）"""
@@ -158,14 +263,7 @@ class GlobTool(BaseTool[Dict[str, Any]]):
         # 访问控制策略
         policy = policy_from_context(context)
 
-        if not os.path.isabs(search_path):
-            base_dir = Path(os.getcwd()).resolve()
-            try:
-                base_dir.relative_to(policy.workspace_root)
-                resolved_base = base_dir
-            except ValueError:
-                resolved_base = policy.workspace_root
-            search_path = os.path.abspath(os.path.join(str(resolved_base), search_path))
+        search_path = resolve_search_path(policy, search_path)
 
         # 访问控制检查
         allowed, reason = check_path_access(policy, Path(search_path), "read")
@@ -176,18 +274,19 @@ class GlobTool(BaseTool[Dict[str, Any]]):
                 metadata={"count": 0, "truncated": False, "error": True}
             )
         
-        # 验证搜索路径存在
-        if not os.path.exists(search_path):
+        # 验证搜索路径存在且为目录（一次stat）
+        try:
+            stat_dir(search_path)
+        except NotADirectoryError:
             return ToolResult(
                 title=pattern,
-                output=f"Error: Search path does not exist: {search_path}",
+                output=f"Error: Search path is not a directory: {search_path}",
                 metadata={"count": 0, "truncated": False, "error": True}
             )
-        
-        if not os.path.isdir(search_path):
+        except OSError:
             return ToolResult(
                 title=pattern,
-                output=f"Error: Search path is not a directory: {search_path}",
+                output=f"Error: Search path does not exist: {search_path}",
                 metadata={"count": 0, "truncated": False, "error": True}
             )
         
@@ -220,22 +319,11 @@ class GlobTool(BaseTool[Dict[str, Any]]):
             truncated = len(files_with_mtime) > limit
             final_files = files_with_mtime[:limit] if truncated else files_with_mtime
             
-            # 生成输出
-            output_lines = []
-            if final_files:
-                # 始终返回绝对路径，避免LLM路径拼接错误
-                display_files = []
-                for file_path, _ in final_files:
-                    # 确保返回绝对路径
-                    display_files.append(os.path.abspath(file_path))
-                
-                output_lines.extend(display_files)
-                
-                if truncated:
-                    output_lines.append("")
-                    output_lines.append("(Results are truncated. Consider using a more specific path or pattern.)")
-            else:
-                output_lines.append("No files found")
+            # 生成输出（匹配结果已是绝对路径，避免LLM路径拼接错误），仅解码最终结果
+            output_lines = [os.fsdecode(file_path) for file_path, _ in final_files]
+            if truncated:
+                output_lines.append("")
+                output_lines.append("(Results are truncated. Consider using a more specific path or pattern.)")
             
             return ToolResult(
                 title=f"{pattern} in {os.path.basename(search_path)}",
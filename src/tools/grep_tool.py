@@ -1,10 +1,133 @@
 import os
-import subprocess
+import re
+import json
+import base64
+import stat
+import asyncio
 import shutil
-from typing import Dict, List, Any, Optional
+import functools
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from .base_tool import BaseTool, ToolContext, ToolResult
-from core.path_guard import policy_from_context, check_path_access
+from core.path_guard import policy_from_context, check_path_access, resolve_search_path
+
+
+# 常量配置
+SEARCH_TIMEOUT = 30  # 30秒超时
+STREAM_LINE_LIMIT = 1 << 20  # 输出读取缓冲区上限，超过的行分块读取
+RESULT_CACHE_SIZE = 64  # 搜索结果缓存条目上限
+MAX_COLUMNS = 300  # 匹配行默认最多显示的列数，0表示不限制
+LONG_LINE_MARKER = " [... omitted end of long line]"  # 与ripgrep --max-columns-preview一致
+
+# 正则元字符；不含这些字符的模式按字面量搜索
+_REGEX_META_RE = re.compile(r'[.^$*+?()\[\]{}|\\]')
+
+# ripgrep --json 中需要的事件前缀（type总是第一个字段），其余事件无需解析
+_JSON_LINE_PREFIXES = (b'{"type":"match"', b'{"type":"context"')
+
+
+@functools.lru_cache(maxsize=1)
+def _which_ripgrep(path_env: Optional[str]) -> Optional[str]:
+    """在给定PATH中查找rg，结果按PATH缓存"""
+    return shutil.which("rg", path=path_env)
+
+
+def find_ripgrep() -> str:
+    """查找ripgrep可执行文件"""
+    # 首先尝试从PATH中查找（按PATH缓存，PATH变化时重新查找）
+    rg_path = _which_ripgrep(os.environ.get("PATH"))
+    if rg_path:
+        return rg_path
+    
+    # 如果没找到，抛出异常
+    raise FileNotFoundError("ripgrep (rg) not found in PATH. Please install ripgrep.")
+
+
+async def _read_line(stream: asyncio.StreamReader) -> bytes:
+    """读取一行输出；超过缓冲区上限的行分块读完后整体返回，不会被丢弃"""
+    chunks = []
+    while True:
+        try:
+            chunks.append(await stream.readuntil(b"\n"))
+            break
+        except asyncio.LimitOverrunError as e:
+            # 缓冲区已满仍未遇到换行：先取走已缓冲的部分，再继续读取该行剩余内容
+            chunks.append(await stream.readexactly(e.consumed))
+        except asyncio.IncompleteReadError as e:
+            # 输出结束：最后一行可能没有换行符
+            chunks.append(e.partial)
+            break
+    return b"".join(chunks)
+
+
+async def run_ripgrep(
+    args: List[str],
+    max_lines: Optional[int] = None,
+    parse_line: Optional[Callable[[bytes], Any]] = None
+) -> Tuple[int, List[Any], str, bool]:
+    """运行ripgrep并逐行读取输出
+    
+    读满max_lines条后再探测到一条即视为截断，立即终止子进程，
+    内存占用只与max_lines相关，与匹配总数无关。
+    指定parse_line时每行原始输出交给它解析，返回None的行不计入结果。
+    返回 (returncode, lines, stderr, truncated)。
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        limit=STREAM_LINE_LIMIT
+    )
+    stderr_task = asyncio.create_task(process.stderr.read())
+    lines: List[Any] = []
+    truncated = False
+    
+    async def read_lines() -> None:
+        nonlocal truncated
+        while True:
+            raw = await _read_line(process.stdout)
+            if not raw:
+                break
+            if parse_line is not None:
+                line = parse_line(raw)
+                if line is None:
+                    continue
+            else:
+                line = raw.rstrip(b"\r\n")
+                if not line and not lines:
+                    continue
+            if max_lines and len(lines) >= max_lines:
+                truncated = True
+                break
+            # 只解码保留下来的行，用于截断探测的那一行无需解码
+            lines.append(line if parse_line is not None else line.decode("utf-8", errors="replace"))
+    
+    try:
+        await asyncio.wait_for(read_lines(), timeout=SEARCH_TIMEOUT)
+    finally:
+        if process.returncode is None and (truncated or not process.stdout.at_eof()):
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        returncode = await process.wait()
+        stderr = (await stderr_task).decode("utf-8", errors="replace")
+    
+    # 与原先对整体输出strip的行为保持一致
+    while lines and lines[-1] == "":
+        lines.pop()
+    return returncode, lines, stderr, truncated
+
+
+@dataclass
+class GrepMatch:
+    """ripgrep --json 输出中的一条匹配/上下文行"""
+    path: str
+    line_number: int
+    text: str
+    is_context: bool = False
 
 
 class GrepTool(BaseTool[Dict[str, Any]]):
@@ -15,7 +138,7 @@ class GrepTool(BaseTool[Dict[str, Any]]):
 
 使用场景：
 - 在代码库中搜索特定模式或字符串
-- 支持正则表达式搜索
+- 支持正则表达式搜索，不含正则元字符的模式自动按字面量快速搜索
 - 快速查找函数、类、变量定义
 - 搜索特定文件类型中的内容
 
@@ -35,11 +158,14 @@ class GrepTool(BaseTool[Dict[str, Any]]):
 - context_after: 显示匹配行后的行数
 - case_insensitive: 是否忽略大小写
 - multiline: 是否启用多行模式
-- head_limit: 限制输出的前N行/条目
+- head_limit: 限制输出的前N行/条目（content模式下同时作为每个文件的最大匹配数传给ripgrep的-m，-m按文件计数而非全局）
+- max_columns: 可选，匹配行最多显示的列数，超出部分省略，默认300，0表示不限制
 
 注意：结果会被截断以保持响应速度；如果结果过多，请使用更具体的路径或模式"""
         
         super().__init__("grep", description)
+        # 搜索结果缓存：键 -> (文件签名, 结果)，按最近使用顺序淘汰
+        self._result_cache: OrderedDict = OrderedDict()
     
     def get_parameters_schema(self) -> Dict[str, Any]:
         """获取参数模式定义"""
@@ -88,6 +214,12 @@ class GrepTool(BaseTool[Dict[str, Any]]):
                     "type": "integer",
                     "minimum": 1,
                     "description": "限制输出的前N行/条目"
+                },
+                "max_columns": {
+                    "type": "integer",
+                    "minimum": 0,
+                    "default": MAX_COLUMNS,
+                    "description": "匹配行最多显示的列数，超出部分省略，0表示不限制"
                 }
             },
             "required": ["pattern"]
@@ -95,13 +227,20 @@ class GrepTool(BaseTool[Dict[str, Any]]):
     
     def _find_ripgrep(self) -> str:
         """查找ripgrep可执行文件"""
-        # 首先尝试从PATH中查找
-        rg_path = shutil.which("rg")
-        if rg_path:
-            return rg_path
+        return find_ripgrep()
+    
+    def _file_signature(self, st: Optional[os.stat_result]) -> Optional[Tuple[int, int, int]]:
+        """返回普通文件的 (inode, 修改时间, 大小) 签名，目录或无法访问时返回None
         
-        # 如果没找到，抛出异常
-        raise FileNotFoundError("ripgrep (rg) not found in PATH. Please install ripgrep.")
+        目录的修改时间不反映其中文件内容的变化，因此只缓存对单个文件的搜索。
+        """
+        if st is None or not stat.S_ISREG(st.st_mode):
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def _is_literal_pattern(self, pattern: str) -> bool:
+        """判断模式是否不含正则元字符，可按字面量搜索（多行模式保持原样）"""
+        return "\n" not in pattern and _REGEX_META_RE.search(pattern) is None
     
     async def execute(self, params: Dict[str, Any], context: ToolContext) -> ToolResult:
         """执行grep搜索"""
@@ -117,14 +256,7 @@ class GrepTool(BaseTool[Dict[str, Any]]):
         # 访问控制策略
         policy = policy_from_context(context)
 
-        if not os.path.isabs(search_path):
-            base_dir = Path(os.getcwd()).resolve()
-            try:
-                base_dir.relative_to(policy.workspace_root)
-                resolved_base = base_dir
-            except ValueError:
-                resolved_base = policy.workspace_root
-            search_path = os.path.abspath(os.path.join(str(resolved_base), search_path))
+        search_path = resolve_search_path(policy, search_path)
 
         # 访问控制检查
         allowed, reason = check_path_access(policy, Path(search_path), "read")
@@ -135,6 +267,32 @@ class GrepTool(BaseTool[Dict[str, Any]]):
                 metadata={"matches": 0, "truncated": False, "error": True}
             )
         
+        # 单个文件未变化时直接复用上次的搜索结果
+        cache_key = (search_path, tuple(sorted((k, repr(v)) for k, v in params.items() if k != "path")))
+        try:
+            st = os.stat(search_path)
+        except OSError:
+            st = None  # 交由ripgrep报告错误
+        signature = self._file_signature(st)
+        if signature is not None:
+            cached = self._result_cache.get(cache_key)
+            if cached is not None and cached[0] == signature:
+                self._result_cache.move_to_end(cache_key)
+                return replace(cached[1], metadata=dict(cached[1].metadata))
+        
+        is_dir = st is not None and stat.S_ISDIR(st.st_mode)
+        result = await self._search(params, pattern, search_path, is_dir)
+        
+        if signature is not None and not result.metadata.get("error"):
+            self._result_cache[cache_key] = (signature, result)
+            self._result_cache.move_to_end(cache_key)
+            while len(self._result_cache) > RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+            result = replace(result, metadata=dict(result.metadata))
+        return result
+    
+    async def _search(self, params: Dict[str, Any], pattern: str, search_path: str, is_dir: bool) -> ToolResult:
+        """构建ripgrep参数并执行搜索"""
         try:
             rg_path = self._find_ripgrep()
         except FileNotFoundError as e:
@@ -146,17 +304,30 @@ class GrepTool(BaseTool[Dict[str, Any]]):
         
         # 构建ripgrep命令参数
         args = [rg_path, "-n", pattern]  # -n显示行号
+        if self._is_literal_pattern(pattern):
+            args.append("-F")  # 无正则元字符时按字面量搜索
         
-        # 添加文件包含模式
+        # 添加文件包含模式（--glob精确匹配给定模式；ripgrep的--type会额外匹配同类扩展名）
         if "include" in params:
             args.extend(["--glob", params["include"]])
         
+        # 限制长行（如压缩后的JS、JSON）的输出宽度
+        max_columns = params.get("max_columns", MAX_COLUMNS)
+        if max_columns:
+            args.extend(["--max-columns", str(max_columns), "--max-columns-preview"])
+        
         # 添加输出模式
         output_mode = params.get("output_mode", "content")
+        parse_line = None
         if output_mode == "files_with_matches":
             args.append("-l")  # 只显示文件名
+            args.append("--sortr=modified")  # 由ripgrep按修改时间降序排列
         elif output_mode == "count":
             args.append("-c")  # 显示匹配计数
+        elif output_mode == "content":
+            args.append("--json")  # 结构化输出，无需按":"切分
+            # ripgrep的JSON输出不受--max-columns影响，解析时自行截断长行
+            parse_line = functools.partial(self._parse_json_line, max_columns=max_columns)
         
         # 添加上下文行
         if "context_before" in params:
@@ -172,55 +343,50 @@ class GrepTool(BaseTool[Dict[str, Any]]):
         if params.get("multiline", False):
             args.extend(["-U", "--multiline-dotall"])
         
+        head_limit = params.get("head_limit")
+        if head_limit:
+            # content模式下单个文件的匹配数不会超过全局上限，交给ripgrep按文件截断；
+            # 多取一条以便判断结果是否被截断
+            if output_mode == "content":
+                args.extend(["-m", str(head_limit + 1)])
+            # 逐行刷新，读满head_limit行后即可尽早终止
+            args.append("--line-buffered")
+        
         # 添加搜索路径
         args.append(search_path)
         
         try:
-            # 执行ripgrep命令
-            result = subprocess.run(
-                args,
-                capture_output=True,
-                text=True,
-                timeout=30  # 30秒超时
+            # 执行ripgrep命令，流式读取输出
+            returncode, lines, stderr, truncated = await self._run_ripgrep(
+                args, head_limit, parse_line
             )
             
             # 处理结果
-            if result.returncode == 1:  # 没有找到匹配
+            if returncode == 1:  # 没有找到匹配
                 return ToolResult(
                     title=pattern,
                     output="No files found",
                     metadata={"matches": 0, "truncated": False}
                 )
             
-            if result.returncode != 0:  # 其他错误
-                error_msg = result.stderr.strip() if result.stderr else "ripgrep failed"
+            if returncode != 0 and not truncated:  # 其他错误
+                error_msg = stderr.strip() if stderr else "ripgrep failed"
                 return ToolResult(
                     title=pattern,
                     output=f"Error: {error_msg}",
                     metadata={"matches": 0, "truncated": False, "error": True}
                 )
             
-            output = result.stdout.strip()
-            if not output:
+            if not lines:
                 return ToolResult(
                     title=pattern,
                     output="No files found",
                     metadata={"matches": 0, "truncated": False}
                 )
             
-            # 处理输出
-            lines = output.split("\n")
-            
-            # 应用head_limit限制
-            head_limit = params.get("head_limit")
-            truncated = False
-            if head_limit and len(lines) > head_limit:
-                lines = lines[:head_limit]
-                truncated = True
-            
             # 格式化输出
             if output_mode == "content":
-                formatted_output = self._format_content_output(lines, search_path)
+                formatted_output = self._format_content_output(lines, search_path, is_dir)
             elif output_mode == "files_with_matches":
                 formatted_output = self._format_files_output(lines)
             elif output_mode == "count":
@@ -241,7 +407,7 @@ class GrepTool(BaseTool[Dict[str, Any]]):
                 }
             )
             
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             return ToolResult(
                 title=pattern,
                 output="Search timed out. Consider using a more specific pattern or path.",
@@ -254,24 +420,60 @@ class GrepTool(BaseTool[Dict[str, Any]]):
                 metadata={"matches": 0, "truncated": False, "error": True}
             )
     
-    def _format_content_output(self, lines: List[str], search_path: str) -> str:
-        """格式化内容输出"""
-        if not lines:
+    async def _run_ripgrep(
+        self,
+        args: List[str],
+        max_lines: Optional[int] = None,
+        parse_line: Optional[Callable[[bytes], Any]] = None
+    ) -> Tuple[int, List[Any], str, bool]:
+        """运行ripgrep并逐行读取输出，见run_ripgrep"""
+        return await run_ripgrep(args, max_lines, parse_line)
+    
+    def _parse_json_line(self, raw: bytes, max_columns: int = 0) -> Optional[GrepMatch]:
+        """解析ripgrep --json的一行，只保留match/context事件
+        
+        max_columns大于0时，超出该长度的行只保留开头部分并追加省略标记。
+        """
+        if not raw.startswith(_JSON_LINE_PREFIXES):
+            return None
+        event = json.loads(raw)
+        data = event["data"]
+        path = self._json_data_text(data["path"], os.fsdecode)
+        text = self._json_data_text(data["lines"], lambda b: b.decode("utf-8", errors="replace"))
+        if path is None or text is None:
+            return None
+        text = text.rstrip("\r\n")
+        if max_columns and len(text) > max_columns:
+            text = text[:max_columns] + LONG_LINE_MARKER
+        return GrepMatch(
+            path=path,
+            line_number=data.get("line_number") or 0,
+            text=text,
+            is_context=event["type"] == "context"
+        )
+    
+    def _json_data_text(self, data: Dict[str, str], decode: Callable[[bytes], str]) -> Optional[str]:
+        """取ripgrep JSON中的文本；非UTF-8内容以base64的bytes字段给出，解码后返回"""
+        text = data.get("text")
+        if text is None and "bytes" in data:
+            text = decode(base64.b64decode(data["bytes"]))
+        return text
+    
+    def _format_content_output(self, matches: List[GrepMatch], search_path: str, is_dir: Optional[bool] = None) -> str:
+        """格式化内容输出，is_dir未给出时自行判断search_path是否为目录"""
+        if not matches:
             return "No matches found"
         
-        output_lines = [f"Found {len(lines)} matches"]
+        match_count = sum(1 for match in matches if not match.is_context)
+        output_lines = [f"Found {match_count} matches"]
         current_file = ""
+        # 搜索单个文件时相对于其所在目录显示
+        if is_dir is None:
+            is_dir = os.path.isdir(search_path)
+        base_path = search_path if is_dir else os.path.dirname(search_path)
         
-        for line in lines:
-            if not line:
-                continue
-            
-            # 解析ripgrep输出格式: file:line:content
-            parts = line.split(":", 2)
-            if len(parts) < 3:
-                continue
-            
-            file_path, line_num, content = parts
+        for match in matches:
+            file_path = match.path
             
             # 显示文件名（如果改变了）
             if current_file != file_path:
@@ -280,13 +482,14 @@ class GrepTool(BaseTool[Dict[str, Any]]):
                 current_file = file_path
                 # 显示相对路径
                 try:
-                    rel_path = os.path.relpath(file_path, search_path)
+                    rel_path = os.path.relpath(file_path, base_path)
                     output_lines.append(f"{rel_path}:")
                 except ValueError:
                     output_lines.append(f"{file_path}:")
             
-            # 显示匹配行
-            output_lines.append(f"  Line {line_num}: {content}")
+            # 显示匹配行（上下文行用"-"区分）
+            separator = "-" if match.is_context else ":"
+            output_lines.append(f"  Line {match.line_number}{separator} {match.text}")
         
         return "\n".join(output_lines)
     
@@ -295,18 +498,9 @@ class GrepTool(BaseTool[Dict[str, Any]]):
         if not lines:
             return "No files found"
         
-        # 按修改时间排序文件
-        files_with_mtime = []
-        for file_path in lines:
-            if os.path.exists(file_path):
-                mtime = os.path.getmtime(file_path)
-                files_with_mtime.append((file_path, mtime))
-        
-        files_with_mtime.sort(key=lambda x: x[1], reverse=True)
-        sorted_files = [f[0] for f in files_with_mtime]
-        
-        output_lines = [f"Found {len(sorted_files)} files"]
-        output_lines.extend(sorted_files)
+        # ripgrep已按修改时间降序输出，直接使用
+        output_lines = [f"Found {len(lines)} files"]
+        output_lines.extend(lines)
         
         return "\n".join(output_lines)
     
@@ -1,9 +1,12 @@
 import os
+import re
 import fnmatch
-from typing import Dict, List, Any, Optional, Set
+import functools
+import itertools
+from typing import Dict, Iterator, List, Any, Optional, Pattern, Set, Tuple
 from pathlib import Path
 from .base_tool import BaseTool, ToolContext, ToolResult
-from core.path_guard import policy_from_context, check_path_access
+from core.path_guard import policy_from_context, check_path_access, resolve_search_path, stat_dir
 
 
 # 默认忽略的目录和文件模式
@@ -45,6 +48,24 @@ IGNORE_PATTERNS = [
 LIMIT = 100
 
 
+@functools.lru_cache(maxsize=32)
+def _compile_globs(patterns: Tuple[str, ...]) -> Optional[Pattern[str]]:
+    """将一组glob模式编译为单个正则（各模式取并集），空列表返回None"""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns))
+
+
+# 预编译默认忽略模式：不含通配符的目录名放入集合按名称精确匹配，
+# 其余模式（含*.egg-info/这类目录通配）编译为一个正则匹配名称
+_IGNORE_DIRS = frozenset(
+    p[:-1] for p in IGNORE_PATTERNS if p.endswith('/') and not any(ch in p for ch in '*?[')
+)
+_IGNORE_NAME_RE = _compile_globs(
+    tuple(p.rstrip('/') for p in IGNORE_PATTERNS if p.rstrip('/') not in _IGNORE_DIRS)
+)
+
+
 class ListTool(BaseTool[Dict[str, Any]]):
     """目录结构列表工具"""
     
@@ -106,99 +127,123 @@ class ListTool(BaseTool[Dict[str, Any]]):
     
     def _should_ignore(self, path: str, ignore_patterns: List[str], show_hidden: bool) -> bool:
         """检查是否应该忽略该路径"""
-        path_obj = Path(path)
+        return self._is_ignored(path, _compile_globs(tuple(ignore_patterns)), show_hidden)
+    
+    def _is_ignored(self, path: str, custom_re: Optional[Pattern[str]], show_hidden: bool) -> bool:
+        """使用预编译的正则检查是否应该忽略该路径"""
+        name = os.path.basename(path)
         
         # 检查是否为隐藏文件
-        if not show_hidden and path_obj.name.startswith('.'):
+        if not show_hidden and name.startswith('.'):
             return True
         
-        # 检查默认忽略模式
-        for pattern in IGNORE_PATTERNS:
-            if pattern.endswith('/'):
-                # 目录模式
-                if pattern[:-1] in str(path_obj) or path_obj.name == pattern[:-1]:
-                    return True
-            else:
-                # 文件模式
-                if fnmatch.fnmatch(path_obj.name, pattern) or fnmatch.fnmatch(str(path_obj), pattern):
-                    return True
+        # 检查默认忽略模式：只看名称本身，被忽略的目录在遍历时不会进入，
+        # 因此其下的路径无需再逐段检查
+        if name in _IGNORE_DIRS or _IGNORE_NAME_RE.match(name):
+            return True
         
         # 检查自定义忽略模式
-        for pattern in ignore_patterns:
-            if fnmatch.fnmatch(path_obj.name, pattern) or fnmatch.fnmatch(str(path_obj), pattern):
-                return True
+        if custom_re is not None and (custom_re.match(name) or custom_re.match(path)):
+            return True
         
         return False
     
-    def _collect_files(self, root_path: str, ignore_patterns: List[str], show_hidden: bool, max_depth: Optional[int]) -> List[str]:
-        """收集文件列表"""
+    def _sorted_entries(self, directory: str) -> List[os.DirEntry]:
+        """按名称排序的目录项，无权限访问时返回空列表"""
+        try:
+            with os.scandir(directory) as it:
+                return sorted(it, key=lambda entry: entry.name)
+        except (PermissionError, OSError):
+            # 忽略无权限访问的目录
+            return []
+    
+    def _collect_files(self, root_path: str, ignore_patterns: List[str], show_hidden: bool, max_depth: Optional[int]) -> Tuple[List[str], Set[str]]:
+        """收集至多LIMIT + 1个条目（多出的一个用于判断是否截断）
+        
+        返回 (相对路径列表, 其中为目录的路径集合)。
+        """
         files = []
+        dirs = set()
+        for rel_path, is_dir in itertools.islice(
+            self._iter_entries(root_path, ignore_patterns, show_hidden, max_depth), LIMIT + 1
+        ):
+            files.append(rel_path)
+            if is_dir:
+                dirs.add(rel_path)
+        return files, dirs
+    
+    def _iter_entries(self, root_path: str, ignore_patterns: List[str], show_hidden: bool, max_depth: Optional[int]) -> Iterator[Tuple[str, bool]]:
+        """基于os.scandir的迭代式深度优先遍历，按字母顺序惰性产出 (相对路径, 是否为目录)"""
+        custom_re = _compile_globs(tuple(ignore_patterns))
+        # 栈中保存 (目录项迭代器, 目录深度, 相对路径前缀)
+        stack = [(iter(self._sorted_entries(root_path)), 0, "")]
         
-        def _walk_directory(current_path: str, current_depth: int = 0):
-            if max_depth is not None and current_depth > max_depth:
-                return
+        while stack:
+            entries, depth, rel_prefix = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                continue
             
-            if len(files) >= LIMIT:
-                return
+            # 检查是否应该忽略
+            if self._is_ignored(entry.path, custom_re, show_hidden):
+                continue
             
-            try:
-                entries = os.listdir(current_path)
-                entries.sort()  # 按字母顺序排序
-                
-                for entry in entries:
-                    if len(files) >= LIMIT:
-                        break
-                    
-                    full_path = os.path.join(current_path, entry)
-                    rel_path = os.path.relpath(full_path, root_path)
-                    
-                    # 检查是否应该忽略
-                    if self._should_ignore(full_path, ignore_patterns, show_hidden):
-                        continue
-                    
-                    files.append(rel_path)
-                    
-                    # 如果是目录，递归处理
-                    if os.path.isdir(full_path):
-                        _walk_directory(full_path, current_depth + 1)
-                        
-            except (PermissionError, OSError):
-                # 忽略无权限访问的目录
-                pass
-        
-        _walk_directory(root_path)
-        return files
+            rel_path = os.path.join(rel_prefix, entry.name) if rel_prefix else entry.name
+            # DirEntry缓存了类型信息，无需额外stat
+            is_dir = entry.is_dir()
+            yield rel_path, is_dir
+            
+            # 如果是目录，继续深入
+            if is_dir and (max_depth is None or depth + 1 <= max_depth):
+                stack.append((iter(self._sorted_entries(entry.path)), depth + 1, rel_path))
     
-    def _build_tree_structure(self, files: List[str]) -> Dict[str, Any]:
-        """构建树状结构"""
+    def _build_tree_structure(self, files: List[str], dirs: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """构建树状结构
+        
+        dirs为收集阶段已知的目录集合，叶子节点据此区分目录与文件，无需再stat；
+        未提供时仅将出现过子路径的节点视为目录。
+        """
         tree = {}
+        dirs = dirs or set()
         
         for file_path in files:
             parts = file_path.split(os.sep)
             current = tree
+            last = len(parts) - 1
             
             for i, part in enumerate(parts):
-                if part not in current:
-                    current[part] = {}
-                
-                # 如果这是最后一个部分且不是目录，标记为文件
-                if i == len(parts) - 1:
-                    full_path = os.path.join(os.getcwd(), file_path) if not os.path.isabs(file_path) else file_path
-                    if not os.path.isdir(full_path):
+                if i == last:
+                    if file_path in dirs:
+                        current.setdefault(part, {})
+                    elif part not in current:
                         current[part] = None  # 文件标记为None
+                    break
                 
-                if current[part] is not None:
-                    current = current[part]
+                subtree = current.get(part)
+                if subtree is None:
+                    subtree = current[part] = {}
+                current = subtree
         
         return tree
     
     def _render_tree(self, tree: Dict[str, Any], prefix: str = "", is_last: bool = True, root_path: str = "") -> List[str]:
         """渲染树状结构"""
-        lines = []
-        items = sorted(tree.items(), key=lambda x: (x[1] is None, x[0]))  # 目录在前，文件在后
+        return list(self._iter_tree_lines(tree, prefix))
+    
+    def _iter_tree_lines(self, tree: Dict[str, Any], prefix: str = "") -> Iterator[str]:
+        """以显式栈代替递归，按先序惰性产出树状结构的每一行"""
+        # 栈中保存 (已排序的子项, 下一个子项下标, 前缀)
+        stack = [(self._sorted_tree_items(tree), 0, prefix)]
         
-        for i, (name, subtree) in enumerate(items):
-            is_last_item = i == len(items) - 1
+        while stack:
+            items, index, prefix = stack.pop()
+            if index >= len(items):
+                continue
+            stack.append((items, index + 1, prefix))
+            
+            name, subtree = items[index]
+            is_last_item = index == len(items) - 1
             
             # 确定当前项的连接符
             if prefix == "":
@@ -209,21 +254,17 @@ class ListTool(BaseTool[Dict[str, Any]]):
                 connector = "└── " if is_last_item else "├── "
                 new_prefix = prefix + ("    " if is_last_item else "│   ")
             
-            # 构建显示名称
-            if subtree is None:
-                # 文件
-                display_name = name
-            else:
-                # 目录
-                display_name = name + "/"
+            # 目录带/后缀，文件（None）直接显示名称
+            display_name = name if subtree is None else name + "/"
+            yield f"{prefix}{connector}{display_name}"
             
-            lines.append(f"{prefix}{connector}{display_name}")
-            
-            # 递归处理子目录
-            if subtree is not None and subtree:
-                lines.extend(self._render_tree(subtree, new_prefix, is_last_item, root_path))
-        
-        return lines
+            # 先处理子目录，再继续当前层的下一个子项
+            if subtree:
+                stack.append((self._sorted_tree_items(subtree), 0, new_prefix))
+    
+    def _sorted_tree_items(self, tree: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """目录在前，文件在后，各自按名称排序"""
+        return sorted(tree.items(), key=lambda x: (x[1] is None, x[0]))
     
     async def execute(self, params: Dict[str, Any], context: ToolContext) -> ToolResult:
         """执行目录列表"""
@@ -236,14 +277,7 @@ class ListTool(BaseTool[Dict[str, Any]]):
         # 访问控制策略
         policy = policy_from_context(context)
 
-        if not os.path.isabs(search_path):
-            base_dir = Path(os.getcwd()).resolve()
-            try:
-                base_dir.relative_to(policy.workspace_root)
-                resolved_base = base_dir
-            except ValueError:
-                resolved_base = policy.workspace_root
-            search_path = os.path.abspath(os.path.join(str(resolved_base), search_path))
+        search_path = resolve_search_path(policy, search_path)
 
         # 访问控制检查
         allowed, reason = check_path_access(policy, Path(search_path), "read")
@@ -254,18 +288,19 @@ class ListTool(BaseTool[Dict[str, Any]]):
                 metadata={"count": 0, "truncated": False, "error": True}
             )
         
-        # 检查路径是否存在
-        if not os.path.exists(search_path):
+        # 检查路径是否存在且为目录（一次stat）
+        try:
+            stat_dir(search_path)
+        except NotADirectoryError:
             return ToolResult(
-                title=f"Directory: {search_path}",
-                output=f"Error: Directory '{search_path}' does not exist",
+                title=f"Path: {search_path}",
+                output=f"Error: '{search_path}' is not a directory",
                 metadata={"count": 0, "truncated": False, "error": True}
             )
-        
-        if not os.path.isdir(search_path):
+        except OSError:
             return ToolResult(
-                title=f"Path: {search_path}",
-                output=f"Error: '{search_path}' is not a directory",
+                title=f"Directory: {search_path}",
+                output=f"Error: Directory '{search_path}' does not exist",
                 metadata={"count": 0, "truncated": False, "error": True}
             )
         
@@ -276,7 +311,10 @@ class ListTool(BaseTool[Dict[str, Any]]):
         
         try:
             # 收集文件列表
-            files = self._collect_files(search_path, ignore_patterns, show_hidden, max_depth)
+            files, dirs = self._collect_files(search_path, ignore_patterns, show_hidden, max_depth)
+            # 收集器多取一个条目用于判断是否截断
+            truncated = len(files) > LIMIT
+            files = files[:LIMIT]
             
             if not files:
                 return ToolResult(
@@ -286,17 +324,13 @@ class ListTool(BaseTool[Dict[str, Any]]):
                 )
             
             # 构建树状结构
-            tree = self._build_tree_structure(files)
-            
-            # 渲染树状结构
-            tree_lines = self._render_tree(tree, "", True, search_path)
+            tree = self._build_tree_structure(files, dirs)
             
-            # 构建输出
+            # 渲染树状结构并构建输出
             output_lines = [f"{search_path}/"]
-            output_lines.extend(tree_lines)
+            output_lines.extend(self._iter_tree_lines(tree))
             
             # 检查是否被截断
-            truncated = len(files) >= LIMIT
             if truncated:
                 output_lines.append("")
                 output_lines.append("(Results are truncated. Consider using a more specific path or ignore patterns.)")
@@ -136,61 +136,75 @@ class MultiEditTool(BaseTool[Dict[str, Any]]):
                     metadata={"error": "identical_strings", "edit_index": i}
                 )
         
+        # 访问控制检查（写入）
+        file_path, allowed, reason = self.edit_tool._resolve_path(file_path, context)
+        if not allowed:
+            return self._failed_result(file_path, 0, f"访问被拒绝: {reason}", [], len(edits))
+        
         # 存储结果
         results = []
-        failed_edit_index = None
         
         try:
-            # 按顺序执行每个编辑操作
-            for i, edit in enumerate(edits):
-                edit_params = {
-                    "filePath": file_path,
-                    "oldString": edit["oldString"],
-                    "newString": edit["newString"],
-                    "replaceAll": edit.get("replaceAll", False)
-                }
-                
-                result = await self.edit_tool.execute(edit_params, context)
-                results.append(result)
-                
-                # 如果编辑失败，停止处理并记录失败的编辑索引
-                if result.metadata and result.metadata.get("error"):
-                    failed_edit_index = i
-                    break
+            # 只读取一次文件；首个编辑为创建文件时无需读取
+            creating = edits[0]["oldString"] == ""
+            if creating:
+                original_content = ""
+            elif not os.path.exists(file_path):
+                return self._failed_result(file_path, 0, f"文件不存在: {file_path}", results, len(edits))
+            elif os.path.isdir(file_path):
+                return self._failed_result(file_path, 0, f"路径是目录，不是文件: {file_path}", results, len(edits))
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    original_content = f.read()
             
-            # 如果有编辑失败，返回失败信息
-            if failed_edit_index is not None:
-                failed_result = results[failed_edit_index]
-                return ToolResult(
-                    title=f"多重编辑失败: {os.path.basename(file_path)}",
-                    output=f"编辑操作 {failed_edit_index + 1} 失败: {failed_result.output}",
-                    metadata={
-                        "error": "multiedit_failed",
-                        "file_path": file_path,
-                        "failed_edit_index": failed_edit_index,
-                        "total_edits": len(edits),
-                        "completed_edits": failed_edit_index,
-                        "results": [r.metadata for r in results]
-                    }
-                )
+            # 在内存中按顺序应用每个编辑，任一失败则放弃全部编辑，文件保持不变
+            content = original_content
+            spliced = None if creating else self._apply_edits_single_pass(content, edits)
+            if spliced is not None:
+                content = spliced
+                results = [
+                    {"file_path": file_path, "action": "edit", "replace_all": False}
+                    for _ in edits
+                ]
+            else:
+                for i, edit in enumerate(edits):
+                    replace_all = edit.get("replaceAll", False)
+                    if edit["oldString"] == "":
+                        content = edit["newString"]
+                        action = "create"
+                    else:
+                        try:
+                            content = self.edit_tool.apply_edit(content, edit["oldString"], edit["newString"], replace_all)
+                        except ValueError as e:
+                            return self._failed_result(file_path, i, str(e), results, len(edits))
+                        action = "edit"
+                    results.append({"file_path": file_path, "action": action, "replace_all": replace_all})
             
-            # 所有编辑成功
-            successful_edits = len(results)
-            last_result = results[-1] if results else None
+            # 全部成功后一次性写入
+            if creating:
+                directory = os.path.dirname(file_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            self.edit_tool._write_file(file_path, content)
             
             return ToolResult(
                 title=os.path.relpath(file_path, os.getcwd()),
-                output=f"多重编辑成功完成 - {successful_edits} 个编辑操作已应用",
+                output=f"多重编辑成功完成 - {len(results)} 个编辑操作已应用",
                 metadata={
                     "file_path": file_path,
                     "total_edits": len(edits),
-                    "successful_edits": successful_edits,
+                    "successful_edits": len(results),
                     "action": "multiedit",
-                    "results": [r.metadata for r in results],
-                    "final_diff": last_result.metadata.get("diff") if last_result and last_result.metadata else None
+                    "results": results,
+                    "final_diff": self.edit_tool._generate_diff(file_path, original_content, content)
                 }
             )
         
+        except UnicodeDecodeError:
+            return self._failed_result(
+                file_path, 0, f"无法解码文件: {file_path}\n文件可能使用了不支持的编码格式", results, len(edits)
+            )
+        
         except Exception as e:
             return ToolResult(
                 title=f"多重编辑错误: {os.path.basename(file_path)}",
@@ -203,3 +217,65 @@ class MultiEditTool(BaseTool[Dict[str, Any]]):
                     "total_edits": len(edits)
                 }
             )
+    
+    def _apply_edits_single_pass(self, content: str, edits: List[Dict[str, Any]]) -> Optional[str]:
+        """在原始内容中一次性定位所有oldString并拼接结果，不满足条件时返回None
+        
+        仅当所有编辑都是单次替换、oldString在原文中恰好出现一次、各匹配之间
+        的间隔足以排除相互影响，且替换后的文本不会为后续编辑引入新的匹配时
+        才走此路径，此时结果与逐个顺序替换完全一致；否则回退到顺序替换。
+        """
+        if len(edits) < 2:
+            return None
+        
+        spans = []
+        for edit in edits:
+            old_string = edit["oldString"]
+            if edit.get("replaceAll", False) or not old_string:
+                return None
+            start = content.find(old_string)
+            if start == -1 or content.rfind(old_string) != start:
+                return None
+            spans.append((start, start + len(old_string)))
+        
+        # 相邻匹配之间至少隔开最长oldString的长度，保证每处替换周围都是原文
+        max_len = max(len(edit["oldString"]) for edit in edits)
+        ordered = sorted(range(len(edits)), key=lambda i: spans[i][0])
+        for prev, cur in zip(ordered, ordered[1:]):
+            if spans[cur][0] - spans[prev][1] < max_len:
+                return None
+        
+        # 后续编辑的oldString不能出现在前面的替换结果及其边界上
+        for i, edit in enumerate(edits):
+            start, end = spans[i]
+            for later in edits[i + 1:]:
+                margin = len(later["oldString"]) - 1
+                window = content[max(0, start - margin):start] + edit["newString"] + content[end:end + margin]
+                if later["oldString"] in window:
+                    return None
+        
+        pieces = []
+        pos = 0
+        for i in ordered:
+            start, end = spans[i]
+            pieces.append(content[pos:start])
+            pieces.append(edits[i]["newString"])
+            pos = end
+        pieces.append(content[pos:])
+        return "".join(pieces)
+    
+    def _failed_result(self, file_path: str, index: int, message: str,
+                       results: List[Dict[str, Any]], total_edits: int) -> ToolResult:
+        """构建第index个编辑失败时的结果"""
+        return ToolResult(
+            title=f"多重编辑失败: {os.path.basename(file_path)}",
+            output=f"编辑操作 {index + 1} 失败: {message}",
+            metadata={
+                "error": "multiedit_failed",
+                "file_path": file_path,
+                "failed_edit_index": index,
+                "total_edits": total_edits,
+                "completed_edits": index,
+                "results": results
+            }
+        )
@@ -1,6 +1,8 @@
 """代码补丁应用器"""
 
+import os
 import re
+import asyncio
 import difflib
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
@@ -10,6 +12,144 @@ import shutil
 from core.config import Config
 
 
+# 生成补丁时的上下文行数
+DIFF_CONTEXT_LINES = 3
+# 超过该大小（字节）的文件交给系统patch(1)应用（可由config.patch_shell_threshold覆盖）
+PATCH_SHELL_THRESHOLD = 100 * 1024
+
+# 补丁行类型
+_CONTEXT = 0
+_REMOVE = 1
+_ADD = 2
+
+# 块头：@@ -start,count +start,count @@（count为1时可省略）
+_HUNK_RE = re.compile(r'@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+# patch(1)报告块以偏移或模糊匹配方式应用："Hunk #1 succeeded at 12 (offset 2 lines)."
+_PATCH_INEXACT_RE = re.compile(r'^Hunk #\d+ succeeded at \d+ .*\((?:offset|fuzz)', re.MULTILINE)
+
+
+def _read_text(file_path: Path) -> str:
+    """读取文本文件（在线程中调用，避免阻塞事件循环）"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _write_temp(file_path: Path, content: str) -> str:
+    """把新内容写入目标文件同目录下的临时文件并沿用原文件权限，返回临时文件路径
+    
+    在线程中调用，避免阻塞事件循环。
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix='.patch-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        shutil.copymode(file_path, tmp_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def _backup_and_replace(file_path: Path, backup_path: Path, new_path: str) -> None:
+    """把原文件保留为备份，再用新文件原子替换原文件（在线程中调用）
+    
+    备份优先用硬链接指向原文件的inode，无需复制内容；os.replace只替换目录项，
+    备份仍指向旧内容。跨设备等无法建立硬链接时退回复制。
+    """
+    try:
+        try:
+            backup_path.unlink(missing_ok=True)
+            os.link(file_path, backup_path)
+        except OSError:
+            shutil.copy2(file_path, backup_path)
+        os.replace(new_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(new_path)
+        except OSError:
+            pass
+        raise
+
+
+async def _run_patch_command(patch_exe: str, file_path: Path, patch_content: str) -> Tuple[Optional[str], Optional[str]]:
+    """调用系统patch(1)应用补丁，返回(结果文件路径, 错误信息)
+
+    结果写入目标文件同目录下的临时文件，由调用方在备份后替换原文件；
+    失败时丢弃拒绝块并删除临时文件，原文件保持不变。
+    与内置实现一致，块必须在声明的行号处逐行匹配：以-F0禁用模糊匹配，
+    patch报告块以偏移位置应用时同样视为失败。
+    """
+    fd, patch_file = tempfile.mkstemp(suffix='.diff')
+    out_fd, output_file = tempfile.mkstemp(dir=file_path.parent, prefix='.patch-')
+    os.close(out_fd)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(patch_content if patch_content.endswith('\n') else patch_content + '\n')
+        
+        process = await asyncio.create_subprocess_exec(
+            patch_exe, '-u', '-f', '-F0', '-r', '-', '--no-backup-if-mismatch',
+            '-o', output_file, str(file_path), '-i', patch_file,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        message = (stdout + stderr).decode('utf-8', errors='replace').strip()
+        if process.returncode != 0 or _PATCH_INEXACT_RE.search(message):
+            os.unlink(output_file)
+            return None, f"补丁应用失败: {message}"
+        
+        shutil.copymode(file_path, output_file)
+        return output_file, None
+    except BaseException:
+        if os.path.exists(output_file):
+            os.unlink(output_file)
+        raise
+    finally:
+        os.unlink(patch_file)
+
+
+def _unified_diff(original_lines: List[str], new_lines: List[str],
+                  fromfile: str = '', tofile: str = '', n: int = DIFF_CONTEXT_LINES) -> List[str]:
+    """生成unified diff行，只对首尾公共部分之外的区域调用difflib
+
+    补丁通常只改动大文件中的少数几行；先线性剥离首尾相同的行（保留n行作为上下文），
+    再把中间区域交给difflib，避免在整个文件上运行其高开销的匹配算法，
+    最后把块头中的行号平移回原文件的位置。
+    """
+    limit = min(len(original_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and original_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix
+           and original_lines[-1 - suffix] == new_lines[-1 - suffix]):
+        suffix += 1
+
+    start = max(0, prefix - n)
+    tail = suffix - min(n, suffix)
+    diff = difflib.unified_diff(
+        original_lines[start:len(original_lines) - tail],
+        new_lines[start:len(new_lines) - tail],
+        fromfile=fromfile,
+        tofile=tofile,
+        n=n,
+        lineterm=''
+    )
+    if not start:
+        return list(diff)
+
+    def shift(match: 're.Match[str]') -> str:
+        old_count = f',{match.group(2)}' if match.group(2) else ''
+        new_count = f',{match.group(4)}' if match.group(4) else ''
+        return (f"@@ -{int(match.group(1)) + start}{old_count} "
+                f"+{int(match.group(3)) + start}{new_count} @@")
+
+    return [
+        _HUNK_RE.sub(shift, line, count=1) if line.startswith('@@') else line
+        for line in diff
+    ]
+
+
 class PatchApplier:
     """代码补丁应用器"""
     
@@ -27,10 +167,6 @@ class PatchApplier:
                     "error": f"目标文件不存在: {file_path}"
                 }
             
-            # 读取原文件内容
-            with open(file_path, 'r', encoding='utf-8') as f:
-                original_content = f.read()
-            
             # 解析补丁
             parsed_patch = self._parse_unified_diff(patch_content)
             if not parsed_patch:
@@ -39,24 +175,42 @@ class PatchApplier:
                     "error": "无法解析补丁格式"
                 }
             
-            # 应用补丁
-            new_content = self._apply_parsed_patch(original_content, parsed_patch)
-            if new_content is None:
-                return {
-                    "success": False,
-                    "error": "补丁应用失败，可能是由于上下文不匹配"
-                }
-            
-            # 创建备份
+            # 符号链接解析为其指向的文件：备份、临时文件和替换都作用于真实文件，
+            # 否则os.replace会用普通文件替换掉链接本身
+            file_path = Path(os.path.realpath(file_path))
             backup_path = file_path.with_suffix(file_path.suffix + '.bak')
-            shutil.copy2(file_path, backup_path)
             
-            # 写入新内容
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            # 大文件交给系统patch(1)处理；传入按解析结果重新渲染的补丁，
+            # 块头行数与块内容一致，接受的补丁与内置实现相同
+            patch_exe = self._patch_command_for(file_path)
+            if patch_exe:
+                output_file, error = await _run_patch_command(
+                    patch_exe, file_path, self._render_chunks(parsed_patch, 'a', 'b')
+                )
+                if error:
+                    return {
+                        "success": False,
+                        "error": error
+                    }
+                await asyncio.to_thread(_backup_and_replace, file_path, backup_path, output_file)
+            else:
+                # 读取原文件内容
+                original_content = await asyncio.to_thread(_read_text, file_path)
+                
+                # 应用补丁
+                new_content = self._apply_parsed_patch(original_content, parsed_patch)
+                if new_content is None:
+                    return {
+                        "success": False,
+                        "error": "补丁应用失败，可能是由于上下文不匹配"
+                    }
+                
+                # 新内容先写入临时文件，再创建备份并原子替换原文件
+                new_path = await asyncio.to_thread(_write_temp, file_path, new_content)
+                await asyncio.to_thread(_backup_and_replace, file_path, backup_path, new_path)
             
             # 计算变更统计
-            stats = self._calculate_patch_stats(original_content, new_content)
+            stats = self._stats_from_chunks(parsed_patch)
             
             return {
                 "success": True,
@@ -72,95 +226,91 @@ class PatchApplier:
             }
     
     def _parse_unified_diff(self, patch_content: str) -> Optional[List[Dict[str, Any]]]:
-        """解析unified diff格式的补丁"""
+        """解析unified diff格式的补丁
+        
+        每个块的lines为 (行类型, 内容) 元组列表，行类型取 _CONTEXT / _REMOVE / _ADD。
+        """
         
         lines = patch_content.strip().split('\n')
         chunks = []
         current_chunk = None
+        append = None  # 当前块lines.append的绑定方法
         
         for line in lines:
-            # 跳过文件头
-            if line.startswith('---') or line.startswith('+++'):
-                continue
-            
-            # 块头：@@ -start,count +start,count @@
-            if line.startswith('@@'):
+            # 按首字符分派，文件头（---/+++）只在对应首字符下再确认
+            c = line[:1]
+            if c == ' ':
+                # 上下文行
+                if append is not None:
+                    append((_CONTEXT, line[1:]))
+            elif c == '-':
+                # 删除行
+                if append is not None and not line.startswith('---'):
+                    append((_REMOVE, line[1:]))
+            elif c == '+':
+                # 添加行
+                if append is not None and not line.startswith('+++'):
+                    append((_ADD, line[1:]))
+            elif c == '@' and line.startswith('@@'):
+                # 块头：@@ -start,count +start,count @@
                 if current_chunk:
                     chunks.append(current_chunk)
                 
-                # 解析块头
-                match = re.match(r'@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@', line)
+                match = _HUNK_RE.match(line)
                 if not match:
                     return None
                 
-                old_start = int(match.group(1))
-                old_count = int(match.group(2)) if match.group(2) else 1
-                new_start = int(match.group(3))
-                new_count = int(match.group(4)) if match.group(4) else 1
-                
+                old_start, old_count, new_start, new_count = match.groups()
                 current_chunk = {
-                    'old_start': old_start,
-                    'old_count': old_count,
-                    'new_start': new_start,
-                    'new_count': new_count,
+                    'old_start': int(old_start),
+                    'old_count': int(old_count) if old_count else 1,
+                    'new_start': int(new_start),
+                    'new_count': int(new_count) if new_count else 1,
                     'lines': []
                 }
-            elif current_chunk is not None:
-                # 补丁行
-                if line.startswith(' '):
-                    # 上下文行
-                    current_chunk['lines'].append({
-                        'type': 'context',
-                        'content': line[1:]
-                    })
-                elif line.startswith('-'):
-                    # 删除行
-                    current_chunk['lines'].append({
-                        'type': 'remove',
-                        'content': line[1:]
-                    })
-                elif line.startswith('+'):
-                    # 添加行
-                    current_chunk['lines'].append({
-                        'type': 'add',
-                        'content': line[1:]
-                    })
+                append = current_chunk['lines'].append
         
         if current_chunk:
             chunks.append(current_chunk)
         
         return chunks if chunks else None
     
+    def _patch_command_for(self, file_path: Path) -> Optional[str]:
+        """文件超过阈值且系统提供patch命令时返回其路径，否则返回None使用内置实现"""
+        
+        threshold = getattr(self.config, 'patch_shell_threshold', PATCH_SHELL_THRESHOLD)
+        if file_path.stat().st_size <= threshold:
+            return None
+        return shutil.which('patch')
+    
     def _apply_parsed_patch(self, original_content: str, chunks: List[Dict[str, Any]]) -> Optional[str]:
-        """应用解析后的补丁"""
+        """应用解析后的补丁
+        
+        按原文件位置顺序单遍合并：未改动的片段直接从原文件复制，块内保留
+        上下文行与添加行并跳过被删除的行，无需先复制整个文件再逐块替换。
+        块之间相互重叠时视为应用失败。
+        """
         
         original_lines = original_content.split('\n')
-        result_lines = original_lines.copy()
+        result_lines = []
+        position = 0  # 原文件中下一个尚未处理的行（0索引）
         
-        # 从后往前应用补丁，避免行号偏移问题
-        for chunk in reversed(chunks):
-            old_start = chunk['old_start'] - 1  # 转换为0索引
+        for chunk in sorted(chunks, key=lambda c: c['old_start']):
+            # 需要与原文件匹配的行数（上下文 + 删除）
+            old_length = sum(1 for kind, _ in chunk['lines'] if kind != _ADD)
+            # 转换为0索引；纯插入块（原范围为0行）的起始行号表示插入在该行之后
+            start = chunk['old_start'] - 1 if old_length else chunk['old_start']
             
-            # 验证上下文
-            if not self._validate_context(original_lines, chunk, old_start):
+            # 验证位置与上下文
+            if start < position or not self._validate_context(original_lines, chunk, start):
                 return None
             
-            # 应用这个块的变更
-            new_chunk_lines = []
-            for patch_line in chunk['lines']:
-                if patch_line['type'] == 'context':
-                    new_chunk_lines.append(patch_line['content'])
-                elif patch_line['type'] == 'add':
-                    new_chunk_lines.append(patch_line['content'])
-                # remove类型的行不添加到新内容中
-            
-            # 计算要替换的行数
-            remove_count = sum(1 for line in chunk['lines'] 
-                             if line['type'] in ['context', 'remove'])
-            
-            # 替换行
-            result_lines[old_start:old_start + remove_count] = new_chunk_lines
+            # 复制块之前未改动的行，再写入这个块的新内容（remove类型的行不添加）
+            result_lines.extend(original_lines[position:start])
+            result_lines.extend(content for kind, content in chunk['lines'] if kind != _REMOVE)
+            position = start + old_length
         
+        result_lines.extend(original_lines[position:])
         return '\n'.join(result_lines)
     
     def _validate_context(self, original_lines: List[str], chunk: Dict[str, Any], start_line: int) -> bool:
@@ -168,31 +318,27 @@ class PatchApplier:
         
         original_idx = start_line
         
-        for patch_line in chunk['lines']:
-            if patch_line['type'] in ['context', 'remove']:
+        for kind, content in chunk['lines']:
+            if kind != _ADD:
                 if (original_idx >= len(original_lines) or 
-                    original_lines[original_idx] != patch_line['content']):
+                    original_lines[original_idx] != content):
                     return False
                 original_idx += 1
         
         return True
     
-    def _calculate_patch_stats(self, original: str, modified: str) -> Dict[str, int]:
-        """计算补丁统计信息"""
-        
-        original_lines = original.split('\n')
-        modified_lines = modified.split('\n')
-        
-        differ = difflib.unified_diff(original_lines, modified_lines, lineterm='')
+    def _stats_from_chunks(self, chunks: List[Dict[str, Any]]) -> Dict[str, int]:
+        """直接根据解析后的补丁块统计增删行数，无需重新比较文件内容"""
         
         added = 0
         removed = 0
         
-        for line in differ:
-            if line.startswith('+') and not line.startswith('+++'):
-                added += 1
-            elif line.startswith('-') and not line.startswith('---'):
-                removed += 1
+        for chunk in chunks:
+            for kind, _ in chunk['lines']:
+                if kind == _ADD:
+                    added += 1
+                elif kind == _REMOVE:
+                    removed += 1
         
         return {
             'added': added,
@@ -200,6 +346,25 @@ class PatchApplier:
             'modified': min(added, removed)
         }
     
+    def _render_chunks(self, chunks: List[Dict[str, Any]], fromfile: str, tofile: str) -> str:
+        """将解析后的补丁块渲染回unified diff文本"""
+        
+        def format_range(start: int, length: int) -> str:
+            return str(start) if length == 1 else f'{start},{length}'
+        
+        prefixes = (' ', '-', '+')  # 按行类型取前缀
+        diff_lines = [f'--- {fromfile}', f'+++ {tofile}']
+        for chunk in chunks:
+            old_length = sum(1 for kind, _ in chunk['lines'] if kind != _ADD)
+            new_length = sum(1 for kind, _ in chunk['lines'] if kind != _REMOVE)
+            diff_lines.append(
+                f"@@ -{format_range(chunk['old_start'], old_length)} "
+                f"+{format_range(chunk['new_start'], new_length)} @@"
+            )
+            diff_lines.extend(prefixes[kind] + content for kind, content in chunk['lines'])
+        
+        return '\n'.join(diff_lines)
+    
     async def create_patch(self, file_path: Path, new_content: str) -> str:
         """创建补丁"""
         
@@ -211,18 +376,13 @@ class PatchApplier:
             return '\n'.join(patch_lines)
         
         # 现有文件
-        with open(file_path, 'r', encoding='utf-8') as f:
-            original_content = f.read()
+        original_content = await asyncio.to_thread(_read_text, file_path)
         
         original_lines = original_content.split('\n')
         new_lines = new_content.split('\n')
         
-        diff = difflib.unified_diff(
-            original_lines,
-            new_lines,
-            fromfile=f'a/{file_path}',
-            tofile=f'b/{file_path}',
-            lineterm=''
+        diff = _unified_diff(
+            original_lines, new_lines, f'a/{file_path}', f'b/{file_path}', n=DIFF_CONTEXT_LINES
         )
         
         return '\n'.join(diff)
@@ -238,8 +398,7 @@ class PatchApplier:
                 }
             
             # 读取原文件
-            with open(file_path, 'r', encoding='utf-8') as f:
-                original_content = f.read()
+            original_content = await asyncio.to_thread(_read_text, file_path)
             
             # 解析并应用补丁
             parsed_patch = self._parse_unified_diff(patch_content)
@@ -256,24 +415,11 @@ class PatchApplier:
                     "error": "补丁应用失败"
                 }
             
-            # 生成预览
-            original_lines = original_content.split('\n')
-            new_lines = new_content.split('\n')
-            
-            diff = list(difflib.unified_diff(
-                original_lines,
-                new_lines,
-                fromfile='原文件',
-                tofile='修改后',
-                lineterm=''
-            ))
-            
-            stats = self._calculate_patch_stats(original_content, new_content)
-            
+            # 补丁块本身就描述了全部变更，直接渲染预览，无需重新比较文件
             return {
                 "success": True,
-                "preview": '\n'.join(diff),
-                "stats": stats
+                "preview": self._render_chunks(parsed_patch, '原文件', '修改后'),
+                "stats": self._stats_from_chunks(parsed_patch)
             }
             
         except Exception as e:
@@ -285,6 +431,8 @@ class PatchApplier:
     async def revert_patch(self, file_path: Path) -> Dict[str, Any]:
         """恢复补丁（从备份文件）"""
         
+        # 与apply_patch一致，备份位于符号链接指向的真实文件旁
+        file_path = Path(os.path.realpath(file_path))
         backup_path = file_path.with_suffix(file_path.suffix + '.bak')
         
         try:
@@ -295,7 +443,7 @@ class PatchApplier:
                 }
             
             # 恢复文件
-            shutil.copy2(backup_path, file_path)
+            await asyncio.to_thread(shutil.copy2, backup_path, file_path)
             
             return {
                 "success": True,
@@ -1,6 +1,6 @@
 """工具注册工厂 - 管理和提供所有可用工具"""
 
-from typing import Dict, List, Type, Optional, Any, Set
+from typing import Dict, List, Type, Optional, Any, Set, Tuple
 from dataclasses import dataclass
 import inspect
 import logging
@@ -51,12 +51,23 @@ class ToolRegistry:
         ListTool,
     ]
     
+    # 按工具类缓存的(名称, 描述, 参数模式)，所有注册表实例共享
+    _TOOL_INFO_CACHE: Dict[Type[BaseTool], Tuple[str, str, Dict[str, Any]]] = {}
+    
     def __init__(self):
         """初始化工具注册表"""
         self._tools: Dict[str, ToolInfo] = {}
         self._instances: Dict[str, BaseTool] = {}
+        # 按enabled_only缓存的排序结果，注册/注销/启用/禁用时失效
+        self._list_cache: Dict[bool, List[ToolInfo]] = {}
+        self._tools_dict_cache: Dict[bool, List[Dict[str, Any]]] = {}
         self._load_default_tools()
     
+    def _invalidate_cache(self) -> None:
+        """工具集合或启用状态变化后清除列表缓存"""
+        self._list_cache.clear()
+        self._tools_dict_cache.clear()
+    
     def _load_default_tools(self) -> None:
         """加载默认工具"""
         for tool_class in self.DEFAULT_TOOLS:
@@ -81,22 +92,18 @@ class ToolRegistry:
             if not issubclass(tool_class, BaseTool):
                 raise ValueError(f"Tool class {tool_class.__name__} must inherit from BaseTool")
             
-            # 创建临时实例以获取工具信息
-            temp_instance = tool_class()
-            tool_id = temp_instance.name
+            # 获取工具信息（按类缓存，重复注册无需再创建临时实例）
+            tool_id, description, parameters = self._describe_tool_class(tool_class)
             
             # 检查是否已存在
             if tool_id in self._tools:
                 logger.warning(f"Tool {tool_id} already registered, replacing...")
             
-            # 获取参数模式
-            parameters = temp_instance.get_parameters_schema()
-            
             # 创建工具信息
             tool_info = ToolInfo(
                 id=tool_id,
-                name=temp_instance.name,
-                description=temp_instance.description,
+                name=tool_id,
+                description=description,
                 tool_class=tool_class,
                 parameters=parameters,
                 enabled=enabled
@@ -104,6 +111,7 @@ class ToolRegistry:
             
             # 注册工具
             self._tools[tool_id] = tool_info
+            self._invalidate_cache()
             
             # 清理临时实例缓存（如果存在）
             if tool_id in self._instances:
@@ -116,6 +124,23 @@ class ToolRegistry:
             logger.error(f"Failed to register tool {tool_class.__name__}: {e}")
             return False
     
+    @classmethod
+    def _describe_tool_class(cls, tool_class: Type[BaseTool]) -> Tuple[str, str, Dict[str, Any]]:
+        """获取工具类的(名称, 描述, 参数模式)
+        
+        CACHE_TOOL_INFO为True的工具类只创建一次临时实例，结果缓存在类级别；
+        否则每次都创建临时实例以反映最新的运行时状态。
+        """
+        cached = cls._TOOL_INFO_CACHE.get(tool_class)
+        if cached is not None:
+            return cached
+        
+        temp_instance = tool_class()
+        info = (temp_instance.name, temp_instance.description, temp_instance.get_parameters_schema())
+        if tool_class.CACHE_TOOL_INFO:
+            cls._TOOL_INFO_CACHE[tool_class] = info
+        return info
+    
     def unregister_tool(self, tool_id: str) -> bool:
         """
         注销工具
@@ -133,6 +158,7 @@ class ToolRegistry:
         try:
             # 删除工具信息
             del self._tools[tool_id]
+            self._invalidate_cache()
             
             # 删除实例缓存
             if tool_id in self._instances:
@@ -216,12 +242,15 @@ class ToolRegistry:
             enabled_only: 是否只返回启用的工具
             
         Returns:
-            List[ToolInfo]: 工具信息列表
+            List[ToolInfo]: 工具信息列表（共享缓存，调用方不应修改）
         """
-        tools = list(self._tools.values())
-        if enabled_only:
-            tools = [tool for tool in tools if tool.enabled]
-        return sorted(tools, key=lambda x: x.id)
+        cached = self._list_cache.get(enabled_only)
+        if cached is None:
+            tools = list(self._tools.values())
+            if enabled_only:
+                tools = [tool for tool in tools if tool.enabled]
+            cached = self._list_cache[enabled_only] = sorted(tools, key=lambda x: x.id)
+        return cached
     
     def get_tool_ids(self, enabled_only: bool = False) -> List[str]:
         """
@@ -233,8 +262,10 @@ class ToolRegistry:
         Returns:
             List[str]: 工具ID列表
         """
-        tools = self.list_tools(enabled_only)
-        return [tool.id for tool in tools]
+        # 直接遍历字典，只对ID排序，无需构造ToolInfo列表
+        ids = [tool_id for tool_id, info in self._tools.items() if not enabled_only or info.enabled]
+        ids.sort()
+        return ids
     
     def enable_tool(self, tool_id: str) -> bool:
         """
@@ -250,6 +281,7 @@ class ToolRegistry:
             return False
         
         self._tools[tool_id].enabled = True
+        self._invalidate_cache()
         logger.info(f"Enabled tool: {tool_id}")
         return True
     
@@ -267,6 +299,7 @@ class ToolRegistry:
             return False
         
         self._tools[tool_id].enabled = False
+        self._invalidate_cache()
         logger.info(f"Disabled tool: {tool_id}")
         return True
     
@@ -291,19 +324,21 @@ class ToolRegistry:
             enabled_only: 是否只返回启用的工具
             
         Returns:
-            List[Dict[str, Any]]: 工具字典列表
+            List[Dict[str, Any]]: 工具字典列表（共享缓存，调用方不应修改）
         """
-        tools = self.list_tools(enabled_only)
-        return [
-            {
-                "id": tool.id,
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.parameters,
-                "enabled": tool.enabled
-            }
-            for tool in tools
-        ]
+        cached = self._tools_dict_cache.get(enabled_only)
+        if cached is None:
+            cached = self._tools_dict_cache[enabled_only] = [
+                {
+                    "id": tool.id,
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.parameters,
+                    "enabled": tool.enabled
+                }
+                for tool in self.list_tools(enabled_only)
+            ]
+        return cached
     
     async def execute_tool(self, tool_id: str, params: Dict[str, Any], context: ToolContext) -> Optional[ToolResult]:
         """
@@ -341,6 +376,17 @@ class ToolRegistry:
         self._instances.clear()
         logger.info("Tool instance cache cleared")
     
+    async def close(self) -> None:
+        """关闭已创建的工具实例持有的资源（如 HTTP 会话），工具提供异步 close() 时调用"""
+        for tool_id, instance in list(self._instances.items()):
+            close = getattr(instance, "close", None)
+            if not inspect.iscoroutinefunction(close):
+                continue
+            try:
+                await close()
+            except Exception as e:
+                logger.warning(f"Failed to close tool {tool_id}: {e}")
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         获取注册表统计信息
@@ -1,8 +1,13 @@
 """沙箱执行器"""
 
 import os
+import re
+import asyncio
+import functools
+import shutil
 import subprocess
 import tempfile
+import weakref
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 import shlex
@@ -13,6 +18,60 @@ from core.config import Config
 from core.path_guard import build_path_policy, check_path_access
 
 
+# 危险命令黑名单
+DANGEROUS_COMMANDS: Dict[str, str] = {
+    "rm -rf /": "禁止删除根目录",
+    "format": "禁止格式化磁盘", 
+    "fdisk": "禁止磁盘分区操作",
+    "mkfs": "禁止创建文件系统",
+    "dd if=/dev/zero": "禁止清零磁盘",
+    ":(){ :|:& };:": "禁止fork炸弹",
+    "chmod 777": "禁止设置777权限",
+    "chown root": "禁止更改为root所有者"
+}
+
+# 同时运行的沙箱命令数上限（可由config.max_concurrent_sandbox覆盖）
+MAX_CONCURRENT_COMMANDS = 8
+
+# 只读模式下禁止的网络命令
+NETWORK_COMMANDS: List[str] = ["curl", "wget", "ssh", "scp", "rsync", "git push"]
+
+
+def _compile_alternation(words) -> re.Pattern:
+    """将多个字面量编译为一个忽略大小写的正则，单次扫描即可找到任一命中（长词优先）
+    
+    忽略大小写由正则完成，无需为每条命令生成小写副本；只做ASCII大小写折叠，
+    命中文本转小写后即可作为原字面量查表。
+    """
+    return re.compile(
+        '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)),
+        re.IGNORECASE | re.ASCII
+    )
+
+
+_DANGEROUS_RE = _compile_alternation(DANGEROUS_COMMANDS)
+_NETWORK_RE = _compile_alternation(NETWORK_COMMANDS)
+
+# 命令检查结果缓存条数
+COMMAND_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=COMMAND_CACHE_SIZE)
+def _check_command(command: str, read_only: bool) -> Tuple[bool, Optional[str]]:
+    """检查命令是否命中黑名单；结果只取决于命令文本和是否只读，按LRU缓存"""
+    match = _DANGEROUS_RE.search(command)
+    if match:
+        return False, DANGEROUS_COMMANDS[match.group(0).lower()]
+    
+    # 网络命令检查
+    if read_only:
+        match = _NETWORK_RE.search(command)
+        if match:
+            return False, f"只读模式下禁止网络操作: {match.group(0).lower()}"
+    
+    return True, None
+
+
 class SandboxExecutor:
     """沙箱执行器"""
     
@@ -29,43 +88,38 @@ class SandboxExecutor:
         
         # 临时目录用于沙箱
         self.temp_dir = Path(tempfile.mkdtemp(prefix="codex_sandbox_"))
+        # 实例被回收或解释器退出时清理临时目录，也可调用close()立即清理
+        self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.temp_dir), ignore_errors=True)
+        
+        # 子进程环境变量：策略在实例生命周期内不变，创建时快照一次，
+        # 各命令共用同一字典（子进程只读取不修改），无需每次复制os.environ
+        self._env = self._build_env()
+        
+        # 限制并发子进程数，避免大量并发工具调用耗尽进程和文件描述符；
+        # 信号量绑定事件循环，而执行器可能被多个事件循环复用，首次使用时按循环创建
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def close(self) -> None:
+        """清理临时目录（可重复调用）"""
+        self._finalizer()
     
-    def __del__(self):
-        """清理临时目录"""
-        import shutil
-        if hasattr(self, 'temp_dir') and self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir, ignore_errors=True)
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环的并发限制，切换事件循环时重建"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(
+                getattr(self.config, 'max_concurrent_sandbox', MAX_CONCURRENT_COMMANDS)
+            )
+            self._semaphore_loop = loop
+        return self._semaphore
     
     def is_command_allowed(self, command: str) -> Tuple[bool, Optional[str]]:
         """检查命令是否被允许"""
         if self.sandbox_policy == SandboxPolicy.DANGER_FULL_ACCESS:
             return True, None
         
-        # 危险命令黑名单
-        dangerous_commands = {
-            "rm -rf /": "禁止删除根目录",
-            "format": "禁止格式化磁盘", 
-            "fdisk": "禁止磁盘分区操作",
-            "mkfs": "禁止创建文件系统",
-            "dd if=/dev/zero": "禁止清零磁盘",
-            ":(){ :|:& };:": "禁止fork炸弹",
-            "chmod 777": "禁止设置777权限",
-            "chown root": "禁止更改为root所有者"
-        }
-        
-        command_lower = command.lower()
-        for dangerous, reason in dangerous_commands.items():
-            if dangerous in command_lower:
-                return False, reason
-        
-        # 网络命令检查
-        if self.sandbox_policy == SandboxPolicy.READ_ONLY:
-            network_commands = ["curl", "wget", "ssh", "scp", "rsync", "git push"]
-            for net_cmd in network_commands:
-                if net_cmd in command_lower:
-                    return False, f"只读模式下禁止网络操作: {net_cmd}"
-        
-        return True, None
+        return _check_command(command, self.sandbox_policy == SandboxPolicy.READ_ONLY)
     
     def get_writable_paths(self) -> List[Path]:
         """获取可写路径列表"""
@@ -116,25 +170,21 @@ class SandboxExecutor:
         # 设置工作目录
         exec_cwd = cwd or self.cwd
         
-        # 准备环境变量
-        env = os.environ.copy()
-        env["CODEX_SANDBOX"] = "python"
-        
-        if self.sandbox_policy != SandboxPolicy.DANGER_FULL_ACCESS:
-            # 限制网络访问
-            env["CODEX_SANDBOX_NETWORK_DISABLED"] = "1"
+        env = self._env
         
         try:
             import time
-            start_time = time.time()
-            
-            # 执行命令
-            if platform.system() == "Windows":
-                result = await self._execute_windows(command, exec_cwd, env, timeout)
-            else:
-                result = await self._execute_unix(command, exec_cwd, env, timeout)
             
-            duration = time.time() - start_time
+            async with self._get_semaphore():
+                start_time = time.time()
+                
+                # 执行命令
+                if platform.system() == "Windows":
+                    result = await self._execute_windows(command, exec_cwd, env, timeout)
+                else:
+                    result = await self._execute_unix(command, exec_cwd, env, timeout)
+                
+                duration = time.time() - start_time
             result["duration"] = duration
             
             return result
@@ -156,6 +206,17 @@ class SandboxExecutor:
                 "duration": 0
             }
     
+    def _build_env(self) -> Dict[str, str]:
+        """准备子进程环境变量"""
+        env = os.environ.copy()
+        env["CODEX_SANDBOX"] = "python"
+        
+        if self.sandbox_policy != SandboxPolicy.DANGER_FULL_ACCESS:
+            # 限制网络访问
+            env["CODEX_SANDBOX_NETWORK_DISABLED"] = "1"
+        
+        return env
+    
     async def _execute_unix(
         self, 
         command: str, 
@@ -1,12 +1,18 @@
 """Task 管理器 - 仅管理子代理会话记录（不做配置化加载）"""
 
-import uuid
+import secrets
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, List, Optional
 
 
-@dataclass
+# 最多保留的会话记录数，超出时优先淘汰最久未访问的已结束会话
+MAX_SESSIONS = 10_000
+
+
+@dataclass(slots=True)
 class SubagentSession:
     """子代理会话记录"""
     id: str                             # 会话ID
@@ -22,24 +28,23 @@ class SubagentSession:
 
 
 class TaskManager:
-    """任务管理器 - 单例模式"""
+    """任务管理器 - 单例模式（线程安全），推荐通过 get_task_manager() 获取"""
     
     _instance: Optional['TaskManager'] = None
+    _instance_lock = threading.Lock()
+    _sessions: "OrderedDict[str, SubagentSession]"
     
     def __new__(cls):
+        # 双重检查加锁，避免多线程同时创建出多个实例
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    # 会话记录是实例属性，在实例发布前初始化完毕
+                    instance._sessions = OrderedDict()
+                    cls._instance = instance
         return cls._instance
     
-    def __init__(self):
-        """初始化任务管理器"""
-        # 避免重复初始化
-        if self._initialized:
-            return
-        self._sessions: Dict[str, SubagentSession] = {}
-        self._initialized = True
-    
     def create_session(
         self,
         parent_session_id: str,
@@ -56,7 +61,10 @@ class TaskManager:
         Returns:
             创建的子代理会话
         """
-        session_id = f"task_{uuid.uuid4().hex[:8]}"
+        # 8位十六进制只需32位随机数；与现有记录冲突时重新生成
+        session_id = f"task_{secrets.token_hex(4)}"
+        while session_id in self._sessions:
+            session_id = f"task_{secrets.token_hex(4)}"
         session = SubagentSession(
             id=session_id,
             parent_session_id=parent_session_id,
@@ -66,8 +74,21 @@ class TaskManager:
             created_at=datetime.now()
         )
         self._sessions[session_id] = session
+        self._evict_sessions()
         return session
     
+    def _evict_sessions(self) -> None:
+        """会话记录超出上限时淘汰：先按最久未访问淘汰非运行中的会话，全部运行中时淘汰最旧的"""
+        while len(self._sessions) > MAX_SESSIONS:
+            victim = next(
+                (sid for sid, s in self._sessions.items() if s.status != "running"),
+                None
+            )
+            if victim is None:
+                self._sessions.popitem(last=False)
+            else:
+                del self._sessions[victim]
+    
     def get_session(self, session_id: str) -> Optional[SubagentSession]:
         """获取子代理会话
         
@@ -77,7 +98,10 @@ class TaskManager:
         Returns:
             子代理会话，如果不存在返回 None
         """
-        return self._sessions.get(session_id)
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
     
     def update_session_status(
         self,
@@ -123,3 +147,8 @@ class TaskManager:
     def clear_sessions(self) -> None:
         """清空所有会话记录（主要用于测试）"""
         self._sessions.clear()
+
+
+def get_task_manager() -> TaskManager:
+    """获取全局任务管理器实例"""
+    return TaskManager._instance or TaskManager()
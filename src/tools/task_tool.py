@@ -1,10 +1,11 @@
 """TaskTool - 启动子代理处理复杂任务"""
 
 import asyncio
+import functools
 from typing import Dict, List, Any, Optional, Tuple
 
 from .base_tool import BaseTool, ToolContext, ToolResult
-from .task_manager import TaskManager
+from .task_manager import get_task_manager
 from core.agents import AgentRegistry
 
 try:
@@ -14,31 +15,7 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 
-class TaskTool(BaseTool[Dict[str, Any]]):
-    """任务工具 - 启动子代理处理复杂的多步骤任务"""
-    
-    def __init__(self, main_config=None):
-        """初始化任务工具
-        
-        Args:
-            main_config: 主 Session 的配置，用于创建子 Session
-        """
-        self.main_config = main_config
-        self.task_manager = TaskManager()
-        self.agent_registry = AgentRegistry.get_instance()
-        
-        # 跟踪活跃的子代理会话（用于中断）
-        # key 使用 TaskManager 生成的 task_session_id（例如 task_1234abcd），确保与返回给调用方的 ID 一致。
-        self._active_subagents: Dict[str, Any] = {}  # {task_session_id: sub_session}
-        
-        # 构建工具描述（使用 AgentRegistry 的子代理）
-        subagents = self.agent_registry.list_agents(mode="subagent")
-        subagents_desc = "\n".join([
-            f"- {agent.name}: {agent.description}"
-            for agent in subagents
-        ])
-        
-        description = f"""启动子代理以自主处理复杂的多步骤任务。
+_DESCRIPTION_TEMPLATE = """启动子代理以自主处理复杂的多步骤任务。
 
 可用的子代理类型及其用途：
 {subagents_desc}
@@ -60,38 +37,71 @@ class TaskTool(BaseTool[Dict[str, Any]]):
 3. 在 task_prompt 中明确说明任务目标和期望输出
 4. 子代理无法与你直接对话，所以提示要详细完整
 5. 可以通过 context_files 参数传递相关文件路径给子代理"""
+
+
+@functools.lru_cache(maxsize=1)
+def _build_description(subagents_desc: str) -> str:
+    """按子代理说明文本生成工具描述"""
+    return _DESCRIPTION_TEMPLATE.format(subagents_desc=subagents_desc)
+
+
+@functools.lru_cache(maxsize=1)
+def _build_parameters_schema(subagent_names: Tuple[str, ...]) -> Dict[str, Any]:
+    """按子代理名称生成参数模式"""
+    return {
+        "type": "object",
+        "properties": {
+            "description": {
+                "type": "string",
+                "description": "任务的简短描述（3-5个词），用于日志和跟踪"
+            },
+            "task_prompt": {
+                "type": "string",
+                "description": "传递给子代理的详细任务描述。需要明确说明期望子代理做什么，以及期望的输出格式。"
+            },
+            "subagent_type": {
+                "type": "string",
+                "enum": list(subagent_names),
+                "description": f"子代理类型，可选值：{', '.join(subagent_names)}"
+            },
+            "context_files": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "可选。需要传递给子代理的文件路径列表。子代理启动时会自动读取这些文件。"
+            }
+        },
+        "required": ["description", "task_prompt", "subagent_type"]
+    }
+
+
+class TaskTool(BaseTool[Dict[str, Any]]):
+    """任务工具 - 启动子代理处理复杂的多步骤任务"""
+    
+    # 描述和参数模式随AgentRegistry中的子代理变化，不能按类缓存
+    CACHE_TOOL_INFO = False
+    
+    def __init__(self, main_config=None):
+        """初始化任务工具
+        
+        Args:
+            main_config: 主 Session 的配置，用于创建子 Session
+        """
+        self.main_config = main_config
+        self.task_manager = get_task_manager()
+        self.agent_registry = AgentRegistry.get_instance()
+        
+        # 跟踪活跃的子代理会话（用于中断）
+        # key 使用 TaskManager 生成的 task_session_id（例如 task_1234abcd），确保与返回给调用方的 ID 一致。
+        self._active_subagents: Dict[str, Any] = {}  # {task_session_id: sub_session}
+        
+        # 构建工具描述（子代理说明由 AgentRegistry 缓存，子代理不变时复用同一描述）
+        description = _build_description(self.agent_registry.describe_agents(mode="subagent"))
         
         super().__init__("task", description)
     
     def get_parameters_schema(self) -> Dict[str, Any]:
-        """获取参数模式定义"""
-        subagents = self.agent_registry.list_agents(mode="subagent")
-        subagent_names = [agent.name for agent in subagents]
-        
-        return {
-            "type": "object",
-            "properties": {
-                "description": {
-                    "type": "string",
-                    "description": "任务的简短描述（3-5个词），用于日志和跟踪"
-                },
-                "task_prompt": {
-                    "type": "string",
-                    "description": "传递给子代理的详细任务描述。需要明确说明期望子代理做什么，以及期望的输出格式。"
-                },
-                "subagent_type": {
-                    "type": "string",
-                    "enum": subagent_names,
-                    "description": f"子代理类型，可选值：{', '.join(subagent_names)}"
-                },
-                "context_files": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "可选。需要传递给子代理的文件路径列表。子代理启动时会自动读取这些文件。"
-                }
-            },
-            "required": ["description", "task_prompt", "subagent_type"]
-        }
+        """获取参数模式定义（子代理名称不变时复用同一个dict）"""
+        return _build_parameters_schema(self.agent_registry.list_agent_names(mode="subagent"))
     
     async def execute(self, params: Dict[str, Any], context: ToolContext) -> ToolResult:
         """执行任务调度
@@ -115,7 +125,7 @@ class TaskTool(BaseTool[Dict[str, Any]]):
         # 从 AgentRegistry 获取子代理配置
         agent = self.agent_registry.get(subagent_type)
         if not agent:
-            available = [a.name for a in self.agent_registry.list_agents(mode="subagent")]
+            available = self.agent_registry.list_agent_names(mode="subagent")
             return ToolResult(
                 title=f"未知的子代理类型: {subagent_type}",
                 output=f"子代理类型 '{subagent_type}' 不存在。可用的子代理: {', '.join(available)}",
@@ -466,7 +476,7 @@ class TaskTool(BaseTool[Dict[str, Any]]):
                     )
                     
                     if event:
-                        logger.debug(f"收到事件: {event.msg.type}")
+                        logger.debug("收到事件: %s", event.msg.type)
                         
                         # 检查是否是任务完成事件
                         if event.msg.type == "task_complete":
@@ -1,22 +1,44 @@
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import json
 from .base_tool import BaseTool, ToolContext, ToolResult
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+
+def _dumps(data: Any) -> str:
+    """序列化为缩进2格的JSON文本；安装了orjson时使用其C实现，输出与json.dumps一致"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+@dataclass(slots=True)
 class TodoInfo:
     """待办事项信息"""
     content: str  # 任务的简要描述
     status: str   # 当前状态: pending, in_progress, completed, cancelled
     id: str       # 唯一标识符
     priority: Optional[str] = "medium"  # 优先级: high, medium, low
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典；字段都是简单类型，直接取属性，避免asdict的递归深拷贝"""
+        return {
+            "content": self.content,
+            "status": self.status,
+            "id": self.id,
+            "priority": self.priority,
+        }
 
 
 class TodoState:
     """全局待办事项状态管理"""
     _instance = None
     _todos: Dict[str, List[TodoInfo]] = {}
+    _active_counts: Dict[str, int] = {}  # 各会话未完成的待办事项数，写入时计算
     
     def __new__(cls):
         if cls._instance is None:
@@ -30,13 +52,16 @@ class TodoState:
     def set_todos(self, session_id: str, todos: List[TodoInfo]):
         """设置指定会话的待办事项"""
         self._todos[session_id] = todos
+        self._active_counts[session_id] = sum(1 for t in todos if t.status != "completed")
+    
+    def get_active_count(self, session_id: str) -> int:
+        """获取指定会话未完成的待办事项数"""
+        if session_id not in self._todos:
+            return 0
+        return self._active_counts.get(session_id, 0)
 
 
-class TodoWriteTool(BaseTool[Dict[str, List[Dict[str, str]]]]):
-    """待办事项写入工具"""
-    
-    def __init__(self):
-        description = """使用此工具为您的当前编码会话创建和管理一个结构化的任务列表。这能帮助您跟踪进度、组织复杂任务，并向用户展示工作的周密性。
+_TODOWRITE_DESCRIPTION = """使用此工具为您的当前编码会话创建和管理一个结构化的任务列表。这能帮助您跟踪进度、组织复杂任务，并向用户展示工作的周密性。
 它还能帮助用户了解任务的进展以及他们请求的总体进度。
 
 ## 何时使用此工具
@@ -151,45 +176,75 @@ Assistant: `git status` 命令显示您工作目录和暂存区的当前状态
       - 使用清晰、描述性的任务名称。
 
 如有疑问，就使用此工具。主动进行任务管理能表现出您的专注度，并确保您成功完成所有需求。"""
-        
-        super().__init__("todowrite", description)
+
+
+_TODOREAD_DESCRIPTION = """使用此工具读取会话的当前待办事项列表。应该主动且频繁地使用此工具，以确保您了解当前任务列表的状态。您应该尽可能经常使用此工具，特别是在以下情况下：
+- 在对话开始时查看待处理的事项
+- 在开始新任务之前确定工作优先级
+- 当用户询问以前的任务或计划时
+- 当您不确定下一步要做什么时
+- 完成任务后更新您对剩余工作的理解
+- 每隔几条消息后确保您在正确的轨道上
+
+用法：
+- 此工具不接受参数。所以输入留空。不要包含虚拟对象、占位符字符串或"input"或"empty"等键。留空即可
+- 返回带有状态、优先级和内容的待办事项列表
+- 使用此信息跟踪进度并规划下一步
+- 如果尚不存在待办事项，将返回空列表"""
+
+
+# 参数模式只构建一次，每次调用返回同一对象（调用方不应修改）
+_TODOWRITE_PARAMETERS: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "todos": {
+            "type": "array",
+            "description": "更新的待办事项列表",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "content": {
+                        "type": "string",
+                        "description": "任务的简要描述"
+                    },
+                    "status": {
+                        "type": "string",
+                        "description": "任务的当前状态: pending, in_progress, completed, cancelled"
+                    },
+                    "id": {
+                        "type": "string", 
+                        "description": "待办事项的唯一标识符"
+                    },
+                    "priority": {
+                        "type": "string",
+                        "description": "任务的优先级: high, medium, low",
+                        "default": "medium"
+                    }
+                },
+                "required": ["content", "status", "id"]
+            }
+        }
+    },
+    "required": ["todos"]
+}
+
+_TODOREAD_PARAMETERS: Dict[str, Any] = {
+    "type": "object",
+    "properties": {},
+    "required": []
+}
+
+
+class TodoWriteTool(BaseTool[Dict[str, List[Dict[str, str]]]]):
+    """待办事项写入工具"""
+    
+    def __init__(self):
+        super().__init__("todowrite", _TODOWRITE_DESCRIPTION)
         self.state = TodoState()
     
     def get_parameters_schema(self) -> Dict[str, Any]:
         """获取参数模式定义"""
-        return {
-            "type": "object",
-            "properties": {
-                "todos": {
-                    "type": "array",
-                    "description": "更新的待办事项列表",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "content": {
-                                "type": "string",
-                                "description": "任务的简要描述"
-                            },
-                            "status": {
-                                "type": "string",
-                                "description": "任务的当前状态: pending, in_progress, completed, cancelled"
-                            },
-                            "id": {
-                                "type": "string", 
-                                "description": "待办事项的唯一标识符"
-                            },
-                            "priority": {
-                                "type": "string",
-                                "description": "任务的优先级: high, medium, low",
-                                "default": "medium"
-                            }
-                        },
-                        "required": ["content", "status", "id"]
-                    }
-                }
-            },
-            "required": ["todos"]
-        }
+        return _TODOWRITE_PARAMETERS
     
     async def execute(self, params: Dict[str, List[Dict[str, str]]], context: ToolContext) -> ToolResult:
         """执行待办事项写入"""
@@ -198,12 +253,14 @@ Assistant: `git status` 命令显示您工作目录和暂存区的当前状态
         
         self.state.set_todos(context.session_id, todos)
         
-        active_count = len([t for t in todos if t.status != "completed"])
+        active_count = self.state.get_active_count(context.session_id)
         
+        # 每次生成新的字典，修改元数据不会影响保存的状态
+        todo_dicts = [todo.to_dict() for todo in todos]
         return ToolResult(
             title=f"{active_count} todos",
-            output=json.dumps([asdict(todo) for todo in todos], indent=2, ensure_ascii=False),
-            metadata={"todos": [asdict(todo) for todo in todos]}
+            output=_dumps(todo_dicts),
+            metadata={"todos": todo_dicts}
         )
 
 
@@ -211,38 +268,21 @@ class TodoReadTool(BaseTool[Dict[str, Any]]):
     """待办事项读取工具"""
     
     def __init__(self):
-        description = """使用此工具读取会话的当前待办事项列表。应该主动且频繁地使用此工具，以确保您了解当前任务列表的状态。您应该尽可能经常使用此工具，特别是在以下情况下：
-- 在对话开始时查看待处理的事项
-- 在开始新任务之前确定工作优先级
-- 当用户询问以前的任务或计划时
-- 当您不确定下一步要做什么时
-- 完成任务后更新您对剩余工作的理解
-- 每隔几条消息后确保您在正确的轨道上
-
-用法：
-- 此工具不接受参数。所以输入留空。不要包含虚拟对象、占位符字符串或"input"或"empty"等键。留空即可
-- 返回带有状态、优先级和内容的待办事项列表
-- 使用此信息跟踪进度并规划下一步
-- 如果尚不存在待办事项，将返回空列表"""
-        
-        super().__init__("todoread", description)
+        super().__init__("todoread", _TODOREAD_DESCRIPTION)
         self.state = TodoState()
     
     def get_parameters_schema(self) -> Dict[str, Any]:
         """获取参数模式定义"""
-        return {
-            "type": "object",
-            "properties": {},
-            "required": []
-        }
+        return _TODOREAD_PARAMETERS
     
     async def execute(self, params: Dict[str, Any], context: ToolContext) -> ToolResult:
         """执行待办事项读取"""
         todos = self.state.get_todos(context.session_id)
-        active_count = len([t for t in todos if t.status != "completed"])
+        active_count = self.state.get_active_count(context.session_id)
         
+        todo_dicts = [todo.to_dict() for todo in todos]
         return ToolResult(
             title=f"{active_count} todos",
-            output=json.dumps([asdict(todo) for todo in todos], indent=2, ensure_ascii=False),
-            metadata={"todos": [asdict(todo) for todo in todos]}
+            output=_dumps(todo_dicts),
+            metadata={"todos": todo_dicts}
         )
@@ -1,6 +1,8 @@
 import asyncio
 import re
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Dict, Any, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 import aiohttp
@@ -10,15 +12,54 @@ from ddgs import DDGS
 
 from .base_tool import BaseTool, ToolContext, ToolResult
 
+try:
+    import lxml  # noqa: F401
+    # lxml 为 C 实现的解析器，解析大页面比 html.parser 快数倍
+    _HTML_PARSER = 'lxml'
+except ImportError:
+    _HTML_PARSER = 'html.parser'
+
+# 提取纯文本时移除的元素
+_NON_TEXT_TAGS = frozenset(('script', 'style', 'noscript', 'iframe', 'object', 'embed'))
+
+# Content-Type 中的字符集
+_CHARSET_RE = re.compile(r'charset=["\']?([^;\s"\']+)', re.IGNORECASE)
+
+# 连续空白字符
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 连续三个及以上的空行（含仅空白的行）
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n')
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    """网页缓存条目"""
+    content: str
+    timestamp: float                    # 写入或最近一次验证的时间
+    content_type: str = "text/html"
+    etag: Optional[str] = None          # 用于条件请求的验证器
+    last_modified: Optional[str] = None
+    
+    @property
+    def revalidatable(self) -> bool:
+        """过期后能否通过条件请求（If-None-Match / If-Modified-Since）验证"""
+        return self.etag is not None or self.last_modified is not None
+
 
 class WebFetchTool(BaseTool[Dict[str, Any]]):
     """网页获取工具 - 从指定 URL 获取内容"""
     
     # 配置常量
     MAX_RESPONSE_SIZE = 5 * 1024 * 1024  # 5MB
+    READ_CHUNK_SIZE = 64 * 1024  # 64KB
     DEFAULT_TIMEOUT = 30  # 30 seconds
     MAX_TIMEOUT = 120  # 2 minutes
     CACHE_DURATION = 15 * 60  # 15 minutes
+    MAX_CACHE_ENTRIES = 128  # 缓存条目上限，超出时淘汰最早写入的
+    MAX_CACHED_BYTES = 2 * 1024 * 1024  # 超过该长度的内容不缓存
+    MAX_CONCURRENT_FETCHES = 50  # 同时进行的请求数上限
+    MAX_FETCHES_PER_HOST = 4  # 同一主机同时进行的请求数上限
     
     def __init__(self):
         description = """从指定的 URL 获取内容。
@@ -39,7 +80,17 @@ class WebFetchTool(BaseTool[Dict[str, Any]]):
 - 包含自清理的 15 分钟缓存，以便在重复访问同一 URL 时获得更快的响应"""
         
         super().__init__("webfetch", description)
-        self._cache: Dict[str, Tuple[str, float]] = {}  # URL -> (content, timestamp)
+        # URL -> 缓存条目，按写入时间排序，过期条目总在最前面；
+        # 带 ETag/Last-Modified 的过期条目保留，用于条件请求
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        # 共享的 HTTP 会话（连接池），首次请求时创建，绑定创建时的事件循环
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # 并发限制，与会话一样绑定事件循环，随会话一起创建
+        self._fetch_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # 正在进行的请求：URL -> 请求任务，同一 URL 的并发请求共用一次获取
+        self._inflight: Dict[str, "asyncio.Task[Tuple[str, str]]"] = {}
     
     def get_parameters_schema(self) -> Dict[str, Any]:
         """获取参数模式定义"""
@@ -68,59 +119,72 @@ class WebFetchTool(BaseTool[Dict[str, Any]]):
         }
     
     def _clean_cache(self):
-        """清理过期的缓存条目"""
+        """清理过期且无法验证的缓存条目（从最早写入的条目开始，遇到未过期的即停止）"""
         current_time = time.time()
-        expired_keys = [
-            url for url, (_, timestamp) in self._cache.items()
-            if current_time - timestamp > self.CACHE_DURATION
-        ]
+        expired_keys = []
+        for url, entry in self._cache.items():
+            if current_time - entry.timestamp <= self.CACHE_DURATION:
+                break
+            if not entry.revalidatable:
+                expired_keys.append(url)
         for key in expired_keys:
             del self._cache[key]
     
-    def _get_from_cache(self, url: str) -> Optional[str]:
-        """从缓存获取内容"""
+    def _get_cache_entry(self, url: str) -> Optional[_CacheEntry]:
+        """获取未过期的缓存条目"""
         self._clean_cache()
-        if url in self._cache:
-            content, timestamp = self._cache[url]
-            if time.time() - timestamp <= self.CACHE_DURATION:
-                return content
-            else:
-                del self._cache[url]
+        entry = self._cache.get(url)
+        if entry is not None and time.time() - entry.timestamp <= self.CACHE_DURATION:
+            return entry
         return None
     
-    def _set_cache(self, url: str, content: str):
+    def _get_from_cache(self, url: str) -> Optional[str]:
+        """从缓存获取内容"""
+        entry = self._get_cache_entry(url)
+        return entry.content if entry is not None else None
+    
+    def _set_cache(
+        self,
+        url: str,
+        content: str,
+        content_type: str = "text/html",
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
         """设置缓存内容"""
-        self._cache[url] = (content, time.time())
+        if len(content) > self.MAX_CACHED_BYTES:
+            # 不缓存过大的内容，同时丢弃该 URL 的旧内容
+            self._cache.pop(url, None)
+            return
+        self._cache[url] = _CacheEntry(content, time.time(), content_type, etag, last_modified)
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.MAX_CACHE_ENTRIES:
+            self._cache.popitem(last=False)
     
     def _validate_url(self, url: str) -> str:
         """验证和标准化 URL"""
-        if not url.startswith(("http://", "https://")):
-            raise ValueError("URL 必须以 http:// 或 https:// 开头")
+        if url.startswith("https://"):
+            return url
         
-        # 自动将 HTTP 升级为 HTTPS（如果合适）
+        # 自动将 HTTP 升级为 HTTPS（前缀已确认，直接拼接）
         if url.startswith("http://"):
-            https_url = url.replace("http://", "https://", 1)
-            return https_url
+            return "https://" + url[7:]
         
-        return url
+        raise ValueError("URL 必须以 http:// 或 https:// 开头")
     
     def _extract_text_from_html(self, html: str) -> str:
         """从 HTML 中提取纯文本"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = BeautifulSoup(html, _HTML_PARSER)
         
-        # 移除脚本和样式元素
-        for element in soup(['script', 'style', 'noscript', 'iframe', 'object', 'embed']):
+        # 移除脚本和样式元素（从后往前移除，嵌套元素先于其父元素移除）
+        for element in reversed(soup.find_all(_NON_TEXT_TAGS)):
             element.decompose()
         
         # 获取文本内容
         text = soup.get_text()
         
-        # 清理空白字符
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        return text
+        # 清理空白字符：连续空白（含换行）合并为一个空格
+        return _WHITESPACE_RE.sub(' ', text).strip()
     
     def _convert_html_to_markdown(self, html: str) -> str:
         """将 HTML 转换为 Markdown"""
@@ -137,12 +201,49 @@ class WebFetchTool(BaseTool[Dict[str, Any]]):
         markdown = h.handle(html)
         
         # 清理多余的空行
-        markdown = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown)
+        markdown = _BLANK_LINES_RE.sub('\n\n', markdown)
         
         return markdown.strip()
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 HTTP 会话，复用连接避免每次请求重新建立 TCP/TLS 连接
+        
+        会话绑定创建时的事件循环，切换事件循环时为新循环重建；
+        使用方应在事件循环结束前调用close()（由Session.cleanup经ToolRegistry.close()完成）。
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            if self._session_loop is not loop:
+                self._fetch_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+                self._host_semaphores = {}
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.DEFAULT_TIMEOUT)
+            )
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self) -> None:
+        """关闭共享的 HTTP 会话（可重复调用）
+        
+        会话只能在创建它的事件循环中关闭，其他事件循环中调用时只解除引用。
+        """
+        if self._session_loop is asyncio.get_running_loop() and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+    
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """获取 URL 所在主机的并发限制"""
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.MAX_FETCHES_PER_HOST)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+    
     async def _fetch_content(self, url: str, timeout: int) -> Tuple[str, str]:
-        """获取网页内容"""
+        """获取网页内容并写入缓存；已有缓存条目带验证器时发送条件请求"""
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
@@ -153,10 +254,24 @@ class WebFetchTool(BaseTool[Dict[str, Any]]):
             'Upgrade-Insecure-Requests': '1',
         }
         
+        stale = self._cache.get(url)
+        if stale is not None:
+            if stale.etag:
+                headers['If-None-Match'] = stale.etag
+            if stale.last_modified:
+                headers['If-Modified-Since'] = stale.last_modified
+        
         timeout_config = aiohttp.ClientTimeout(total=timeout)
         
-        async with aiohttp.ClientSession(timeout=timeout_config) as session:
-            async with session.get(url, headers=headers) as response:
+        session = await self._get_session()
+        # 先等待主机配额再占用全局配额，避免排队中的同主机请求占满全局配额
+        async with self._get_host_semaphore(url), self._fetch_semaphore:
+            async with session.get(url, headers=headers, timeout=timeout_config) as response:
+                if response.status == 304 and stale is not None:
+                    # 内容未变化：沿用缓存内容并刷新缓存时间
+                    self._set_cache(url, stale.content, stale.content_type, stale.etag, stale.last_modified)
+                    return stale.content, stale.content_type
+                
                 if not response.ok:
                     raise aiohttp.ClientResponseError(
                         request_info=response.request_info,
@@ -170,24 +285,51 @@ class WebFetchTool(BaseTool[Dict[str, Any]]):
                 if content_length and int(content_length) > self.MAX_RESPONSE_SIZE:
                     raise ValueError("响应过大（超过 5MB 限制）")
                 
-                # 读取内容
-                content = await response.read()
-                if len(content) > self.MAX_RESPONSE_SIZE:
-                    raise ValueError("响应过大（超过 5MB 限制）")
+                # 分块读取内容，超过上限立即中止（不依赖可能缺失或不实的 content-length）
+                buf = bytearray()
+                async for chunk in response.content.iter_chunked(self.READ_CHUNK_SIZE):
+                    buf.extend(chunk)
+                    if len(buf) > self.MAX_RESPONSE_SIZE:
+                        raise ValueError("响应过大（超过 5MB 限制）")
+                content = bytes(buf)
                 
                 # 解码内容
-                charset = 'utf-8'
                 content_type = response.headers.get('content-type', '')
-                if 'charset=' in content_type:
-                    charset = content_type.split('charset=')[1].split(';')[0].strip()
+                match = _CHARSET_RE.search(content_type)
+                charset = match.group(1).lower() if match else 'utf-8'
                 
-                try:
-                    text_content = content.decode(charset)
-                except UnicodeDecodeError:
+                if charset in ('utf-8', 'utf8'):
+                    # 最常见的情况：直接按 UTF-8 解码，与解码失败后的回退结果一致
                     text_content = content.decode('utf-8', errors='ignore')
+                else:
+                    try:
+                        text_content = content.decode(charset)
+                    except (UnicodeDecodeError, LookupError):
+                        text_content = content.decode('utf-8', errors='ignore')
                 
+                self._set_cache(
+                    url, text_content, content_type,
+                    response.headers.get('etag'), response.headers.get('last-modified')
+                )
                 return text_content, content_type
     
+    async def _fetch_shared(self, url: str, timeout: int) -> Tuple[str, str]:
+        """获取网页内容，同一 URL 已有请求在进行时等待其结果而不重复请求"""
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_content(url, timeout))
+            self._inflight[url] = task
+            task.add_done_callback(lambda t: self._finish_inflight(url, t))
+        # shield：某个等待者被取消时不影响其他等待同一结果的调用
+        return await asyncio.shield(task)
+    
+    def _finish_inflight(self, url: str, task: asyncio.Task) -> None:
+        """请求完成后移除记录；异常已由各等待者处理，这里标记为已读取"""
+        if self._inflight.get(url) is task:
+            del self._inflight[url]
+        if not task.cancelled():
+            task.exception()
+    
     async def execute(self, params: Dict[str, Any], context: ToolContext) -> ToolResult:
         """执行网页获取"""
         url = params["url"]
@@ -199,26 +341,24 @@ class WebFetchTool(BaseTool[Dict[str, Any]]):
             url = self._validate_url(url)
             
             # 检查缓存
-            cached_content = self._get_from_cache(url)
-            if cached_content:
-                content, content_type = cached_content, "text/html (cached)"
+            cached = self._get_cache_entry(url)
+            if cached is not None and cached.content:
+                content, content_type = cached.content, f"{cached.content_type} (cached)"
             else:
-                # 获取内容
-                content, content_type = await self._fetch_content(url, timeout)
-                # 缓存内容
-                self._set_cache(url, content)
+                # 获取内容（_fetch_content 负责写入缓存）
+                content, content_type = await self._fetch_shared(url, timeout)
             
             title = f"{url} ({content_type})"
             
-            # 根据格式处理内容
+            # 根据格式处理内容（HTML 解析是 CPU 密集操作，放到线程中执行以免阻塞事件循环）
             if format_type == "text":
                 if "text/html" in content_type:
-                    output = self._extract_text_from_html(content)
+                    output = await asyncio.to_thread(self._extract_text_from_html, content)
                 else:
                     output = content
             elif format_type == "markdown":
                 if "text/html" in content_type:
-                    output = self._convert_html_to_markdown(content)
+                    output = await asyncio.to_thread(self._convert_html_to_markdown, content)
                 else:
                     output = f"```\n{content}\n```"
             elif format_type == "html":
@@ -264,6 +404,12 @@ class WebFetchTool(BaseTool[Dict[str, Any]]):
             )
 
 
+def _search_text(query: str, search_params: Dict[str, Any]) -> list:
+    """使用 DuckDuckGo 搜索（同步），客户端在调用线程内创建和关闭"""
+    with DDGS() as ddgs:
+        return list(ddgs.text(query, **search_params))
+
+
 class WebSearchTool(BaseTool[Dict[str, Any]]):
     """网络搜索工具 - 使用 DuckDuckGo 搜索"""
     
@@ -327,19 +473,12 @@ class WebSearchTool(BaseTool[Dict[str, Any]]):
         if not results:
             return "未找到相关搜索结果。"
         
-        formatted_results = []
-        for i, result in enumerate(results, 1):
-            title = result.get('title', '无标题')
-            url = result.get('href', '')
-            body = result.get('body', '无描述')
-            
-            formatted_result = f"""**{i}. {title}**
-URL: {url}
-摘要: {body}
-"""
-            formatted_results.append(formatted_result)
-        
-        return "\n".join(formatted_results)
+        return "\n".join(
+            f"**{i}. {result.get('title', '无标题')}**\n"
+            f"URL: {result.get('href', '')}\n"
+            f"摘要: {result.get('body', '无描述')}\n"
+            for i, result in enumerate(results, 1)
+        )
     
     async def execute(self, params: Dict[str, Any], context: ToolContext) -> ToolResult:
         """执行网络搜索"""
@@ -357,18 +496,17 @@ URL: {url}
             )
         
         try:
-            # 使用 DuckDuckGo 搜索
-            with DDGS() as ddgs:
-                search_params = {
-                    "region": region,
-                    "safesearch": safesearch,
-                    "max_results": max_results
-                }
-                
-                if timelimit:
-                    search_params["timelimit"] = timelimit
-                
-                results = list(ddgs.text(query, **search_params))
+            search_params = {
+                "region": region,
+                "safesearch": safesearch,
+                "max_results": max_results
+            }
+            
+            if timelimit:
+                search_params["timelimit"] = timelimit
+            
+            # DDGS 是同步客户端，在线程中执行以免阻塞事件循环
+            results = await asyncio.to_thread(_search_text, query, search_params)
             
             if not results:
                 return ToolResult(
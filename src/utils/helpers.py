@@ -1,9 +1,33 @@
 """工具函数"""
 
 import json
+import os
+import re
+from pathlib import Path
 from typing import Any, Optional, Dict
 from datetime import timedelta
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 匹配```语言\n代码\n```格式的代码块
+_CODE_BLOCK_RE = re.compile(r'```(\w+)?\n(.*?)\n```', re.DOTALL)
+
+# 19位及以上的连续数字：可能超出orjson支持的64位整数范围（orjson会将其解析为浮点数）
+_LONG_DIGITS_RE = re.compile(r'\d{19}')
+
+# 视为文本文件的扩展名
+_TEXT_EXTENSIONS = frozenset({
+    '.txt', '.py', '.js', '.ts', '.html', '.css', '.json', '.xml',
+    '.md', '.rst', '.yml', '.yaml', '.toml', '.ini', '.cfg',
+    '.sh', '.bash', '.bat', '.ps1', '.sql', '.go', '.rs', '.java',
+    '.c', '.cpp', '.h', '.hpp', '.cs', '.php', '.rb', '.swift',
+    '.kt', '.scala', '.clj', '.hs', '.elm', '.ml', '.pl', '.r'
+})
+
 
 def format_duration(seconds: float) -> str:
     """格式化持续时间"""
@@ -26,6 +50,12 @@ def truncate_text(text: str, max_length: int = 1000, suffix: str = "...") -> str
 
 def safe_json_loads(text: str, default: Any = None) -> Any:
     """安全的JSON解析"""
+    if orjson is not None and isinstance(text, str) and not _LONG_DIGITS_RE.search(text):
+        try:
+            return orjson.loads(text)
+        except (orjson.JSONDecodeError, TypeError):
+            # orjson 不接受 NaN/Infinity 等标准库允许的写法，失败时交给 json 判定
+            pass
     try:
         return json.loads(text)
     except (json.JSONDecodeError, TypeError):
@@ -34,11 +64,7 @@ def safe_json_loads(text: str, default: Any = None) -> Any:
 
 def extract_code_blocks(text: str) -> list:
     """从文本中提取代码块"""
-    import re
-    
-    # 匹配```语言\n代码\n```格式的代码块
-    pattern = r'```(\w+)?\n(.*?)\n```'
-    matches = re.findall(pattern, text, re.DOTALL)
+    matches = _CODE_BLOCK_RE.findall(text)
     
     code_blocks = []
     for language, code in matches:
@@ -51,33 +77,27 @@ def extract_code_blocks(text: str) -> list:
 
 
 def is_binary_file(file_path: str) -> bool:
-    """检查是否是二进制文件"""
+    """检查是否是二进制文件（开头1024字节中含NUL）"""
     try:
-        with open(file_path, 'rb') as f:
-            chunk = f.read(1024)
-            return b'\0' in chunk
+        # 只读一小块，直接用文件描述符避免创建缓冲文件对象
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            chunk = os.read(fd, 1024)
+        finally:
+            os.close(fd)
+        return b'\0' in chunk
     except:
         return True
 
 
 def get_file_extension(file_path: str) -> str:
     """获取文件扩展名"""
-    from pathlib import Path
     return Path(file_path).suffix.lower()
 
 
 def is_text_file(file_path: str) -> bool:
-    """检查是否是文本文件"""
-    if is_binary_file(file_path):
+    """检查是否是文本文件（扩展名在文本类型中且内容不是二进制）"""
+    # 先做不读文件的扩展名检查，不匹配时无需打开文件
+    if get_file_extension(file_path) not in _TEXT_EXTENSIONS:
         return False
-    
-    text_extensions = {
-        '.txt', '.py', '.js', '.ts', '.html', '.css', '.json', '.xml',
-        '.md', '.rst', '.yml', '.yaml', '.toml', '.ini', '.cfg',
-        '.sh', '.bash', '.bat', '.ps1', '.sql', '.go', '.rs', '.java',
-        '.c', '.cpp', '.h', '.hpp', '.cs', '.php', '.rb', '.swift',
-        '.kt', '.scala', '.clj', '.hs', '.elm', '.ml', '.pl', '.r'
-    }
-    
-    ext = get_file_extension(file_path)
-    return ext in text_extensions
+    return not is_binary_file(file_path)
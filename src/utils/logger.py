@@ -1,8 +1,9 @@
 import logging
 import os
+import threading
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 
 class Logger:
@@ -28,8 +29,7 @@ class Logger:
             self._setup_handlers()
 
     def _setup_handlers(self) -> None:
-        if not os.path.exists(self.log_dir):
-            os.makedirs(self.log_dir)
+        os.makedirs(self.log_dir, exist_ok=True)
 
         formatter = logging.Formatter(
             fmt='%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s',
@@ -55,29 +55,60 @@ class Logger:
         self.logger.addHandler(file_handler)
         self.logger.addHandler(console_handler)
 
-    def debug(self, message: str) -> None:
-        self.logger.debug(message, stacklevel=2)
+    def isEnabledFor(self, level: int) -> bool:
+        """级别是否会被记录；可在构造开销较大的日志内容前判断"""
+        return self.logger.isEnabledFor(level)
 
-    def info(self, message: str) -> None:
-        self.logger.info(message, stacklevel=2)
+    # 支持 %-style 延迟格式化，如 debug("val=%s", x)：级别未启用时不做任何格式化
+    def debug(self, message: str, *args: Any) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(message, *args, stacklevel=2)
 
-    def warning(self, message: str) -> None:
-        self.logger.warning(message, stacklevel=2)
+    def info(self, message: str, *args: Any) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(message, *args, stacklevel=2)
 
-    def error(self, message: str) -> None:
-        self.logger.error(message, stacklevel=2)
+    def warning(self, message: str, *args: Any) -> None:
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(message, *args, stacklevel=2)
 
-    def critical(self, message: str) -> None:
-        self.logger.critical(message, stacklevel=2)
+    def error(self, message: str, *args: Any) -> None:
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error(message, *args, stacklevel=2)
 
+    def critical(self, message: str, *args: Any) -> None:
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.logger.critical(message, *args, stacklevel=2)
 
-logger = Logger()
 
-debug = logger.debug
-info = logger.info
-warning = logger.warning
-error = logger.error
-critical = logger.critical
+class _LazyLogger:
+    """首次使用时才创建默认 Logger，仅导入本模块不会创建日志目录或打开日志文件"""
+
+    def __init__(self) -> None:
+        self._instance: Optional[Logger] = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> Logger:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = Logger()
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+
+logger = _LazyLogger()
+
+_SHORTCUTS = frozenset(('debug', 'info', 'warning', 'error', 'critical'))
+
+
+def __getattr__(name: str) -> Any:
+    # from utils.logger import debug 等快捷函数在被导入时才解析，避免模块导入即创建 Logger
+    if name in _SHORTCUTS:
+        return getattr(logger, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_logger(
@@ -91,10 +122,10 @@ def get_logger(
 
 
 if __name__ == '__main__':
-    info('这是一条INFO级别的日志')
-    debug('这是一条DEBUG级别的日志')
-    warning('这是一条WARNING级别的日志')
-    error('这是一条ERROR级别的日志')
-    critical('这是一条CRITICAL级别的日志')
+    logger.info('这是一条INFO级别的日志')
+    logger.debug('这是一条DEBUG级别的日志')
+    logger.warning('这是一条WARNING级别的日志')
+    logger.error('这是一条ERROR级别的日志')
+    logger.critical('这是一条CRITICAL级别的日志')
 
     logger.info('这是一条INFO级别的日志2')
@@ -240,6 +240,33 @@ class TestAgentRegistry(unittest.TestCase):
         names = [a.name for a in all_agents]
         self.assertIn("hidden", names)
 
+    def test_list_agents_cache_invalidation(self):
+        """测试 list_agents 结果缓存在注册/移除后失效"""
+        registry = AgentRegistry()
+        
+        subagents = registry.list_agents(mode="subagent")
+        self.assertIs(registry.list_agents(mode="subagent"), subagents)
+        
+        registry.register(AgentInfo(
+            name="custom",
+            description="自定义",
+            mode="subagent",
+            allowed_tools=["read"],
+            native=False,
+        ))
+        self.assertIn("custom", [a.name for a in registry.list_agents(mode="subagent")])
+        self.assertNotIn("custom", [a.name for a in registry.list_agents(mode="primary")])
+        
+        self.assertIn("- custom: 自定义", registry.describe_agents(mode="subagent"))
+        self.assertIn("custom", registry.list_agent_names(mode="subagent"))
+        
+        registry.remove("custom")
+        self.assertNotIn("custom", [a.name for a in registry.list_agents(mode="subagent")])
+        self.assertNotIn("custom", registry.describe_agents(mode="subagent"))
+        self.assertNotIn("custom", registry.list_agent_names(mode="subagent"))
+        self.assertIs(registry.list_agent_names(mode="subagent"), registry.list_agent_names(mode="subagent"))
+        self.assertIs(registry.describe_agents(mode="subagent"), registry.describe_agents(mode="subagent"))
+
 
 class TestBuiltinAgents(unittest.TestCase):
     """测试内置 agents 的配置"""
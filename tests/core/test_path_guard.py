@@ -10,7 +10,7 @@ from pathlib import Path
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 
-from core.path_guard import build_path_policy, check_path_access
+from core.path_guard import build_path_policy, check_path_access, resolve_search_path, stat_dir
 
 
 class DummyConfig:
@@ -73,5 +73,54 @@ class TestPathGuard(unittest.TestCase):
         self.assertFalse(allowed)
 
 
+    def test_sibling_prefix_and_read_only_subpath(self):
+        config = DummyConfig(self.workspace, "workspace_write")
+        policy = build_path_policy(config)
+
+        # a sibling sharing the workspace name as a string prefix is outside
+        sibling = Path(str(self.workspace) + "-other") / "e.txt"
+        allowed, _ = check_path_access(policy, sibling, "write")
+        self.assertFalse(allowed)
+
+        allowed, reason = check_path_access(policy, self.workspace / ".git" / "config", "write")
+        self.assertFalse(allowed)
+        self.assertIn("只读", reason)
+        allowed, reason = check_path_access(policy, self.workspace / ".gitignore", "write")
+        self.assertTrue(allowed, reason)
+
+    def test_resolve_search_path(self):
+        policy = build_path_policy(DummyConfig(self.workspace, "workspace_write"))
+        absolute = str(self.outside / "x")
+        self.assertEqual(resolve_search_path(policy, absolute), absolute)
+
+        original_cwd = os.getcwd()
+        try:
+            # cwd outside the workspace: relative paths resolve against the workspace root
+            os.chdir(self.outside)
+            self.assertEqual(
+                resolve_search_path(policy, "sub"),
+                os.path.join(str(policy.workspace_root), "sub"),
+            )
+            # cwd inside the workspace: relative paths resolve against cwd
+            inner = self.workspace / "inner"
+            inner.mkdir()
+            os.chdir(inner)
+            self.assertEqual(
+                resolve_search_path(policy, "sub"),
+                os.path.join(str(inner.resolve()), "sub"),
+            )
+        finally:
+            os.chdir(original_cwd)
+
+    def test_stat_dir(self):
+        self.assertTrue(stat_dir(str(self.workspace)))
+        file_path = self.workspace / "file.txt"
+        file_path.write_text("data", encoding="utf-8")
+        with self.assertRaises(NotADirectoryError):
+            stat_dir(str(file_path))
+        with self.assertRaises(FileNotFoundError):
+            stat_dir(str(self.workspace / "missing"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -93,6 +93,32 @@ class TestEditTool(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    def test_edit_through_symlink(self):
+        """测试编辑符号链接时修改其指向的文件，链接保持不变"""
+        async def run_test():
+            target_dir = os.path.join(self.test_dir, "real")
+            os.makedirs(target_dir)
+            target = os.path.join(target_dir, "target.py")
+            link = os.path.join(self.test_dir, "link.py")
+            with open(target, 'w') as f:
+                f.write("value = 1\n")
+            os.symlink(target, link)
+            
+            result = await self.edit_tool.execute({
+                "filePath": link,
+                "oldString": "value = 1",
+                "newString": "value = 2"
+            }, self.context)
+            
+            self.assertEqual(result.metadata["action"], "edit")
+            self.assertTrue(os.path.islink(link))
+            self.assertEqual(os.readlink(link), target)
+            with open(target, 'r') as f:
+                self.assertEqual(f.read(), "value = 2\n")
+            self.assertEqual(os.listdir(target_dir), ["target.py"])
+        
+        asyncio.run(run_test())
+    
     def test_multiline_replacement(self):
         """测试多行替换"""
         async def run_test():
@@ -144,6 +144,22 @@ class TestFileTools(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    def test_file_suggestions_cached(self):
+        """测试文件建议在短时间内被缓存"""
+        missing_file = os.path.join(self.test_dir, "notes.txt")
+        self.assertEqual(self.read_tool._get_file_suggestions(missing_file), [])
+        
+        # 缓存有效期内新建的相似文件不会触发重新扫描
+        with open(os.path.join(self.test_dir, "old_notes.txt"), 'w') as f:
+            f.write("old notes")
+        self.assertEqual(self.read_tool._get_file_suggestions(missing_file), [])
+        
+        # 缓存失效后重新扫描
+        self.read_tool._suggestion_cache.clear()
+        suggestions = self.read_tool._get_file_suggestions(missing_file)
+        self.assertEqual(len(suggestions), 1)
+        self.assertTrue(suggestions[0].endswith("old_notes.txt"))
+    
     def test_read_empty_file(self):
         """测试读取空文件"""
         async def run_test():
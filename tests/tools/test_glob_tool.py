@@ -485,6 +485,22 @@ class TestGlobTool(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    def test_recursive_follows_directory_symlinks(self):
+        """测试**进入指向目录的符号链接（与glob.glob一致），指回祖先目录的链接不会造成循环"""
+        ws = os.path.join(self.test_dir, "ws")
+        target = os.path.join(self.test_dir, "outside")
+        os.makedirs(os.path.join(target, "sub"))
+        with open(os.path.join(target, "sub", "a.py"), "w") as f:
+            f.write("")
+        os.makedirs(ws)
+        os.symlink(target, os.path.join(ws, "link"))
+        os.symlink(ws, os.path.join(target, "sub", "back"))
+        
+        matches = [os.fsdecode(m) for m in self.glob_tool._glob_recursive("**/*.py", ws)]
+        
+        self.assertIn(os.path.join(ws, "link", "sub", "a.py"), matches)
+        self.assertEqual(len(matches), 1)
+    
     def test_manual_recursive_search(self):
         """测试手动递归搜索（作为glob的后备方案）"""
         matches = self.glob_tool._manual_recursive_search("*.py", self.test_dir)
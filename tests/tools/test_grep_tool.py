@@ -14,11 +14,11 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 
 try:
-    from tools.grep_tool import GrepTool
+    from tools.grep_tool import GrepTool, GrepMatch, STREAM_LINE_LIMIT, LONG_LINE_MARKER
     from tools.base_tool import ToolContext
 except ImportError:
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
-    from tools.grep_tool import GrepTool
+    from tools.grep_tool import GrepTool, GrepMatch, STREAM_LINE_LIMIT, LONG_LINE_MARKER
     from tools.base_tool import ToolContext
 
 
@@ -309,6 +309,46 @@ This line has TEST in uppercase.
         
         asyncio.run(run_test())
     
+    def test_run_ripgrep_stops_at_limit(self):
+        """测试流式读取在达到限制后提前终止"""
+        async def run_test():
+            try:
+                rg_path = self.grep_tool._find_ripgrep()
+            except FileNotFoundError:
+                self.skipTest("ripgrep not available")
+            
+            returncode, lines, _, truncated = await self.grep_tool._run_ripgrep(
+                [rg_path, "-n", ".", self.test_dir], 3
+            )
+            
+            self.assertEqual(len(lines), 3)
+            self.assertTrue(truncated)
+            self.assertIsNotNone(returncode)
+        
+        asyncio.run(run_test())
+    
+    def test_line_longer_than_stream_limit(self):
+        """测试超过读取缓冲区上限的匹配行不被丢弃，只截断显示内容"""
+        async def run_test():
+            try:
+                self.grep_tool._find_ripgrep()
+            except FileNotFoundError:
+                self.skipTest("ripgrep not available")
+            
+            minified = os.path.join(self.test_dir, "bundle.min.js")
+            with open(minified, "w", encoding="utf-8") as f:
+                f.write("var a=1;" * (2 * STREAM_LINE_LIMIT // 8) + "needle();\nneedle_tail();\n")
+            
+            for path in (minified, self.test_dir):
+                result = await self.grep_tool.execute({"pattern": "needle", "path": path}, self.context)
+                
+                self.assertEqual(result.metadata["matches"], 2, result.output)
+                self.assertIn(LONG_LINE_MARKER, result.output)
+                self.assertIn("needle_tail();", result.output)
+                self.assertLess(len(result.output), 2000)
+        
+        asyncio.run(run_test())
+    
     def test_no_matches(self):
         """测试没有匹配的情况"""
         async def run_test():
@@ -362,17 +402,132 @@ This line has TEST in uppercase.
     
     def test_format_content_output(self):
         """测试内容输出格式化"""
-        lines = [
-            "/path/to/file1.py:10:    def test_function():",
-            "/path/to/file1.py:15:    return test_value",
-            "/path/to/file2.js:5:function test() {"
+        matches = [
+            GrepMatch("/path/to/file1.py", 10, "    def test_function():"),
+            GrepMatch("/path/to/file1.py", 11, "        value = {'key': 1}", is_context=True),
+            GrepMatch("/path/to/file1.py", 15, "    return test_value"),
+            GrepMatch("/path/to/file2.js", 5, "function test() {")
         ]
         
-        formatted = self.grep_tool._format_content_output(lines, "/path/to")
+        formatted = self.grep_tool._format_content_output(matches, "/path/to")
         
         self.assertIn("Found 3 matches", formatted)
         self.assertIn("file1.py:", formatted)
         self.assertIn("Line 10:", formatted)
+        self.assertIn("Line 11-         value = {'key': 1}", formatted)
+    
+    def test_parse_json_line(self):
+        """测试解析ripgrep --json输出"""
+        raw = (
+            b'{"type":"match","data":{"path":{"text":"/a/b.py"},'
+            b'"lines":{"text":"x = {\'k\': 1}\\n"},"line_number":3,'
+            b'"absolute_offset":0,"submatches":[]}}\n'
+        )
+        match = self.grep_tool._parse_json_line(raw)
+        
+        self.assertEqual(match.path, "/a/b.py")
+        self.assertEqual(match.line_number, 3)
+        self.assertEqual(match.text, "x = {'k': 1}")
+        self.assertFalse(match.is_context)
+        
+        # begin/end/summary事件被忽略
+        self.assertIsNone(self.grep_tool._parse_json_line(b'{"type":"begin","data":{}}\n'))
+        
+        # 超长行被截断并追加省略标记
+        long_raw = (
+            b'{"type":"match","data":{"path":{"text":"/a/min.js"},'
+            b'"lines":{"text":"' + b'x' * 50 + b'\\n"},"line_number":1,'
+            b'"absolute_offset":0,"submatches":[]}}\n'
+        )
+        match = self.grep_tool._parse_json_line(long_raw, max_columns=10)
+        self.assertEqual(match.text, "x" * 10 + " [... omitted end of long line]")
+        self.assertEqual(self.grep_tool._parse_json_line(long_raw).text, "x" * 50)
+        
+        # 非UTF-8内容以base64给出，按替换字符解码而不是丢弃
+        latin_raw = (
+            b'{"type":"match","data":{"path":{"text":"latin.txt"},'
+            b'"lines":{"bytes":"Y2Fm6SBuZWVkbGUK"},"line_number":1,'
+            b'"absolute_offset":0,"submatches":[]}}\n'
+        )
+        match = self.grep_tool._parse_json_line(latin_raw)
+        self.assertEqual(match.path, "latin.txt")
+        self.assertEqual(match.text, "caf\ufffd needle")
+    
+    def test_single_file_result_cache(self):
+        """测试单个文件未变化时复用搜索结果，文件修改后重新搜索"""
+        async def run_test():
+            try:
+                self.grep_tool._find_ripgrep()
+            except FileNotFoundError:
+                self.skipTest("ripgrep not available")
+            
+            test_file = os.path.join(self.test_dir, "cached.txt")
+            with open(test_file, 'w') as f:
+                f.write("needle one\n")
+            params = {"pattern": "needle", "path": test_file}
+            
+            calls = []
+            original_search = self.grep_tool._search
+            
+            async def counting_search(*args):
+                calls.append(args)
+                return await original_search(*args)
+            
+            self.grep_tool._search = counting_search
+            
+            first = await self.grep_tool.execute(params, self.context)
+            second = await self.grep_tool.execute(params, self.context)
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(first.output, second.output)
+            
+            with open(test_file, 'a') as f:
+                f.write("needle two\n")
+            third = await self.grep_tool.execute(params, self.context)
+            self.assertEqual(len(calls), 2)
+            self.assertIn("needle two", third.output)
+            
+            # 目录搜索不缓存
+            await self.grep_tool.execute({"pattern": "needle", "path": self.test_dir}, self.context)
+            await self.grep_tool.execute({"pattern": "needle", "path": self.test_dir}, self.context)
+            self.assertEqual(len(calls), 4)
+        
+        asyncio.run(run_test())
+    
+    def test_is_literal_pattern(self):
+        """测试字面量模式检测"""
+        self.assertTrue(self.grep_tool._is_literal_pattern("def main"))
+        self.assertTrue(self.grep_tool._is_literal_pattern("TODO:"))
+        self.assertFalse(self.grep_tool._is_literal_pattern("def .*"))
+        self.assertFalse(self.grep_tool._is_literal_pattern("foo|bar"))
+        self.assertFalse(self.grep_tool._is_literal_pattern(r"\bword"))
+        self.assertFalse(self.grep_tool._is_literal_pattern("a{2}"))
+    
+    def test_include_matches_exact_extension(self):
+        """测试include只匹配给定扩展名，不扩展到同类型的其他扩展名"""
+        async def run_test():
+            try:
+                self.grep_tool._find_ripgrep()
+            except FileNotFoundError:
+                self.skipTest("ripgrep not available")
+            
+            pair_dir = os.path.join(self.test_dir, "pairs")
+            os.makedirs(pair_dir)
+            for name in ("app.ts", "view.tsx", "mod.py", "stub.pyi"):
+                with open(os.path.join(pair_dir, name), 'w') as f:
+                    f.write("needle\n")
+            
+            for include, expected, excluded in (("*.ts", "app.ts", "view.tsx"), ("*.py", "mod.py", "stub.pyi")):
+                result = await self.grep_tool.execute({
+                    "pattern": "needle",
+                    "path": pair_dir,
+                    "include": include,
+                    "output_mode": "files_with_matches"
+                }, self.context)
+                
+                self.assertIn(expected, result.output)
+                self.assertNotIn(excluded, result.output)
+        
+        asyncio.run(run_test())
     
     def test_format_files_output(self):
         """测试文件列表输出格式化"""
@@ -387,6 +542,38 @@ This line has TEST in uppercase.
         self.assertIn("Found", formatted)
         self.assertIn("files", formatted)
     
+    def test_files_with_matches_sorted_by_mtime(self):
+        """测试文件列表由ripgrep按修改时间降序排列"""
+        async def run_test():
+            try:
+                self.grep_tool._find_ripgrep()
+            except FileNotFoundError:
+                self.skipTest("ripgrep not available")
+            
+            mtime_dir = os.path.join(self.test_dir, "mtime")
+            os.makedirs(os.path.join(mtime_dir, "sub"))
+            files = [
+                os.path.join(mtime_dir, "sub", "old.txt"),
+                os.path.join(mtime_dir, "middle.txt"),
+                os.path.join(mtime_dir, "sub", "new.txt")
+            ]
+            for i, file_path in enumerate(files):
+                with open(file_path, 'w') as f:
+                    f.write("needle")
+                os.utime(file_path, (1000 + i, 1000 + i))
+            
+            result = await self.grep_tool.execute({
+                "pattern": "needle",
+                "path": mtime_dir,
+                "output_mode": "files_with_matches"
+            }, self.context)
+            
+            output_lines = result.output.splitlines()
+            self.assertEqual(output_lines[0], "Found 3 files")
+            self.assertEqual(output_lines[1:], list(reversed(files)))
+        
+        asyncio.run(run_test())
+    
     def test_format_count_output(self):
         """测试计数输出格式化"""
         lines = [
@@ -128,6 +128,12 @@ class TestListTool(unittest.TestCase):
         self.assertTrue(self.list_tool._should_ignore(".git", [], False))
         self.assertFalse(self.list_tool._should_ignore("src", [], False))
         self.assertFalse(self.list_tool._should_ignore("tests", [], False))
+        self.assertTrue(self.list_tool._should_ignore("/repo/pkg.egg-info", [], False))
+        
+        # 名称中仅包含忽略目录名的路径不应被忽略
+        self.assertFalse(self.list_tool._should_ignore("/repo/binary_data.txt", [], False))
+        self.assertFalse(self.list_tool._should_ignore("/repo/cabinet", [], False))
+        self.assertFalse(self.list_tool._should_ignore("/tmp/build/project/main.py", [], False))
     
     def test_should_ignore_file(self):
         """测试文件忽略判断"""
@@ -370,6 +376,44 @@ class TestListTool(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    def test_exact_limit_not_truncated(self):
+        """测试条目数恰好等于限制时不标记为截断"""
+        async def run_test():
+            exact_dir = os.path.join(self.test_dir, "exact")
+            os.makedirs(exact_dir, exist_ok=True)
+            for i in range(100):
+                with open(os.path.join(exact_dir, f"file_{i:03d}.txt"), "w") as f:
+                    f.write(f"File {i}")
+            
+            files, _ = self.list_tool._collect_files(exact_dir, [], False, None)
+            self.assertEqual(len(files), 100)
+            
+            result = await self.list_tool.execute({"path": exact_dir}, self.context)
+            self.assertEqual(result.metadata["count"], 100)
+            self.assertFalse(result.metadata["truncated"])
+            
+            with open(os.path.join(exact_dir, "file_100.txt"), "w") as f:
+                f.write("File 100")
+            files, _ = self.list_tool._collect_files(exact_dir, [], False, None)
+            self.assertEqual(len(files), 101)
+            
+            result = await self.list_tool.execute({"path": exact_dir}, self.context)
+            self.assertEqual(result.metadata["count"], 100)
+            self.assertTrue(result.metadata["truncated"])
+        
+        asyncio.run(run_test())
+    
+    def test_empty_directory_listed(self):
+        """测试不含文件的目录也出现在列表中"""
+        async def run_test():
+            os.makedirs(os.path.join("src", "blank"), exist_ok=True)
+            
+            result = await self.list_tool.execute({"path": self.test_dir}, self.context)
+            
+            self.assertIn("blank/", result.output)
+        
+        asyncio.run(run_test())
+    
     def test_build_tree_structure(self):
         """测试树状结构构建"""
         files = [
@@ -392,6 +436,17 @@ class TestListTool(unittest.TestCase):
             if "subdir" in structure["dir1"]:
                 self.assertIn("file3.txt", structure["dir1"]["subdir"])
     
+    def test_build_tree_structure_with_dirs(self):
+        """测试使用目录集合区分空目录与文件"""
+        files = ["empty", "pkg", os.path.join("pkg", "mod.py"), "readme"]
+        dirs = {"empty", "pkg"}
+        
+        structure = self.list_tool._build_tree_structure(files, dirs)
+        
+        self.assertEqual(structure["empty"], {})
+        self.assertEqual(structure["pkg"], {"mod.py": None})
+        self.assertIsNone(structure["readme"])
+    
     def test_render_tree_structure(self):
         """测试树形结构渲染"""
         structure = {
@@ -411,6 +466,21 @@ class TestListTool(unittest.TestCase):
         self.assertIn("file1.txt", rendered_str)
         self.assertIn("dir1/", rendered_str)  # 目录应该有/后缀
 
+    
+    def test_render_deep_tree(self):
+        """测试渲染超过递归深度限制的目录树"""
+        structure = {}
+        current = structure
+        for i in range(2000):
+            current[f"d{i}"] = {}
+            current = current[f"d{i}"]
+        current["leaf.txt"] = None
+        
+        rendered = self.list_tool._render_tree(structure, "  ", True, self.test_dir)
+        
+        self.assertEqual(len(rendered), 2001)
+        self.assertEqual(rendered[0], "  └── d0/")
+        self.assertTrue(rendered[-1].endswith("└── leaf.txt"))
 
 if __name__ == '__main__':
     unittest.main()
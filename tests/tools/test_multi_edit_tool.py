@@ -107,6 +107,32 @@ class TestMultiEditTool(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    def test_multi_edit_through_symlink(self):
+        """测试编辑符号链接时修改其指向的文件，链接保持不变"""
+        async def run_test():
+            target_dir = os.path.join(self.test_dir, "real")
+            os.makedirs(target_dir)
+            target = os.path.join(target_dir, "target.py")
+            link = os.path.join(self.test_dir, "link.py")
+            with open(target, 'w') as f:
+                f.write("a = 1\nb = 2\n")
+            os.symlink(target, link)
+            
+            result = await self.multi_edit_tool.execute({
+                "filePath": link,
+                "edits": [
+                    {"oldString": "a = 1", "newString": "a = 10"},
+                    {"oldString": "b = 2", "newString": "b = 20"}
+                ]
+            }, self.context)
+            
+            self.assertEqual(result.metadata["successful_edits"], 2)
+            self.assertTrue(os.path.islink(link))
+            with open(target, 'r') as f:
+                self.assertEqual(f.read(), "a = 10\nb = 20\n")
+        
+        asyncio.run(run_test())
+    
     def test_multiple_edit_operations(self):
         """测试多个编辑操作"""
         async def run_test():
@@ -339,15 +365,59 @@ class PlaceholderClass:
             self.assertEqual(result.metadata["completed_edits"], 1)
             self.assertEqual(result.metadata["total_edits"], 3)
             
-            # 验证只有第一个编辑被应用
+            # 编辑是原子的：任一编辑失败时文件保持原样
             with open(test_file, 'r') as f:
-                content = f.read()
+                self.assertEqual(f.read(), content)
+        
+        asyncio.run(run_test())
+    
+    def test_final_diff_and_mode_preserved(self):
+        """测试一次写入后保留文件权限，并返回整体差异"""
+        async def run_test():
+            test_file = os.path.join(self.test_dir, "mode_test.sh")
+            with open(test_file, 'w') as f:
+                f.write("echo one\necho two\n")
+            os.chmod(test_file, 0o755)
+            
+            result = await self.multi_edit_tool.execute({
+                "filePath": test_file,
+                "edits": [
+                    {"oldString": "echo one", "newString": "echo 1"},
+                    {"oldString": "echo two", "newString": "echo 2"}
+                ]
+            }, self.context)
             
-            self.assertIn("Hello, World!", content)  # 第一个编辑成功
-            self.assertIn("def hello", content)      # 第三个编辑未执行
+            self.assertEqual(result.metadata["successful_edits"], 2)
+            self.assertEqual(os.stat(test_file).st_mode & 0o777, 0o755)
+            self.assertIn("-echo one", result.metadata["final_diff"])
+            self.assertIn("+echo 2", result.metadata["final_diff"])
+            self.assertEqual(os.listdir(self.test_dir), ["mode_test.sh"])
         
         asyncio.run(run_test())
     
+    def test_apply_edits_single_pass(self):
+        """测试一次性拼接仅在与顺序替换等价时启用"""
+        content = "alpha = 1\nbeta = 2\ngamma = 3\n"
+        edits = [
+            {"oldString": "gamma", "newString": "c"},
+            {"oldString": "alpha", "newString": "a"}
+        ]
+        self.assertEqual(
+            self.multi_edit_tool._apply_edits_single_pass(content, edits),
+            "a = 1\nbeta = 2\nc = 3\n"
+        )
+        
+        # 前一个替换结果引入了后续编辑的匹配，需回退到顺序替换
+        chained = [
+            {"oldString": "alpha", "newString": "beta_new"},
+            {"oldString": "beta", "newString": "b"}
+        ]
+        self.assertIsNone(self.multi_edit_tool._apply_edits_single_pass(content, chained))
+        
+        # replaceAll 不走一次性拼接
+        replace_all = [dict(edit, replaceAll=True) for edit in edits]
+        self.assertIsNone(self.multi_edit_tool._apply_edits_single_pass(content, replace_all))
+    
     def test_multiline_edits(self):
         """测试多行编辑"""
         async def run_test():
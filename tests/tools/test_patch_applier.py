@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""PatchApplier 单元测试"""
+
+import unittest
+import asyncio
+import difflib
+import os
+import tempfile
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from tools.patch_applier import PatchApplier, _unified_diff
+
+
+class TestPatchApplier(unittest.TestCase):
+    """PatchApplier 测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.test_dir = tempfile.mkdtemp()
+        self.patch_applier = PatchApplier(SimpleNamespace(cwd=Path(self.test_dir)))
+        self.file_path = Path(self.test_dir) / "sample.py"
+        self.original = "\n".join(f"line {i}" for i in range(1, 21)) + "\n"
+        self.file_path.write_text(self.original, encoding="utf-8")
+
+    def tearDown(self):
+        """测试后清理"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _modified(self) -> str:
+        return self.original.replace("line 10\n", "line ten\nline 10.5\n")
+
+    def test_create_and_apply_patch(self):
+        """测试创建补丁后再应用得到目标内容"""
+        async def run_test():
+            new_content = self._modified()
+            patch = await self.patch_applier.create_patch(self.file_path, new_content)
+
+            result = await self.patch_applier.apply_patch(self.file_path, patch)
+
+            self.assertTrue(result["success"], result.get("error"))
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), new_content)
+            self.assertEqual(result["stats"], {"added": 2, "removed": 1, "modified": 1})
+            self.assertTrue(os.path.exists(result["backup_path"]))
+
+        asyncio.run(run_test())
+
+    def test_apply_patch_atomic_with_hardlink_backup(self):
+        """测试原子替换原文件，备份保留旧内容且不留临时文件"""
+        async def run_test():
+            os.chmod(self.file_path, 0o640)
+            original_inode = os.stat(self.file_path).st_ino
+            Path(str(self.file_path) + ".bak").write_text("stale backup", encoding="utf-8")
+            new_content = self._modified()
+            patch = await self.patch_applier.create_patch(self.file_path, new_content)
+
+            result = await self.patch_applier.apply_patch(self.file_path, patch)
+
+            self.assertTrue(result["success"], result.get("error"))
+            backup = Path(result["backup_path"])
+            self.assertEqual(backup.read_text(encoding="utf-8"), self.original)
+            self.assertEqual(os.stat(backup).st_ino, original_inode)
+            self.assertNotEqual(os.stat(self.file_path).st_ino, original_inode)
+            self.assertEqual(os.stat(self.file_path).st_mode & 0o777, 0o640)
+            self.assertEqual(sorted(os.listdir(self.test_dir)), ["sample.py", "sample.py.bak"])
+
+            reverted = await self.patch_applier.revert_patch(self.file_path)
+            self.assertTrue(reverted["success"])
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), self.original)
+
+        asyncio.run(run_test())
+
+    def test_apply_patch_through_symlink(self):
+        """测试给符号链接打补丁时修改其指向的文件，链接保持不变，备份位于真实文件旁"""
+        async def run_test(threshold):
+            self.patch_applier.config.patch_shell_threshold = threshold
+            self.file_path.write_text(self.original, encoding="utf-8")
+            link = Path(self.test_dir) / "link.py"
+            link.unlink(missing_ok=True)
+            os.symlink(self.file_path, link)
+            new_content = self._modified()
+            patch = await self.patch_applier.create_patch(link, new_content)
+
+            result = await self.patch_applier.apply_patch(link, patch)
+
+            self.assertTrue(result["success"], result.get("error"))
+            self.assertTrue(link.is_symlink())
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), new_content)
+            self.assertEqual(Path(result["backup_path"]), Path(str(self.file_path) + ".bak"))
+            self.assertEqual(Path(result["backup_path"]).read_text(encoding="utf-8"), self.original)
+
+            reverted = await self.patch_applier.revert_patch(link)
+            self.assertTrue(reverted["success"], reverted.get("error"))
+            self.assertTrue(link.is_symlink())
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), self.original)
+
+        asyncio.run(run_test(100 * 1024))
+        if shutil.which("patch"):
+            asyncio.run(run_test(0))
+
+    def test_apply_patch_context_mismatch(self):
+        """测试上下文不匹配时不修改文件"""
+        async def run_test():
+            patch = "@@ -3,2 +3,2 @@\n line 3\n-not there\n+replacement"
+
+            result = await self.patch_applier.apply_patch(self.file_path, patch)
+
+            self.assertFalse(result["success"])
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), self.original)
+
+        asyncio.run(run_test())
+
+    def test_apply_patch_requires_exact_position(self):
+        """测试上下文不符或行号偏移的块在阈值上下都应用失败（系统patch不做模糊或偏移匹配）"""
+        async def run_test(threshold):
+            self.patch_applier.config.patch_shell_threshold = threshold
+            patches = [
+                "@@ -9,3 +9,3 @@\n line 9\n-line 10\n+line ten\n line x",
+                "@@ -5,3 +5,3 @@\n line 9\n-line 10\n+line ten\n line 11",
+            ]
+            for patch in patches:
+                result = await self.patch_applier.apply_patch(self.file_path, patch)
+
+                self.assertFalse(result["success"], patch)
+                self.assertEqual(self.file_path.read_text(encoding="utf-8"), self.original)
+                self.assertEqual(os.listdir(self.test_dir), ["sample.py"])
+
+        asyncio.run(run_test(100 * 1024))
+        if shutil.which("patch"):
+            asyncio.run(run_test(0))
+
+    def test_apply_patch_with_wrong_header_counts(self):
+        """测试块头行数与内容不符时按块内容应用，阈值上下结果一致"""
+        async def run_test(threshold):
+            self.patch_applier.config.patch_shell_threshold = threshold
+            self.file_path.write_text(self.original, encoding="utf-8")
+            patch = "@@ -9,5 +9,5 @@\n line 9\n-line 10\n+line ten\n line 11"
+
+            result = await self.patch_applier.apply_patch(self.file_path, patch)
+
+            self.assertTrue(result["success"], result.get("error"))
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"),
+                             self.original.replace("line 10\n", "line ten\n"))
+            os.unlink(result["backup_path"])
+
+        asyncio.run(run_test(100 * 1024))
+        if shutil.which("patch"):
+            asyncio.run(run_test(0))
+
+    def test_apply_patch_with_large_context(self):
+        """测试上下文行数很多的块（如diff -U500生成的补丁）正常应用"""
+        async def run_test():
+            original = "\n".join(f"line {i}" for i in range(1, 301)) + "\n"
+            self.file_path.write_text(original, encoding="utf-8")
+            new_content = original.replace("line 150\n", "line one-fifty\n")
+            patch = "\n".join(_unified_diff(original.split("\n"), new_content.split("\n"), n=500))
+
+            result = await self.patch_applier.apply_patch(self.file_path, patch)
+
+            self.assertTrue(result["success"], result.get("error"))
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), new_content)
+
+        asyncio.run(run_test())
+
+    @unittest.skipUnless(shutil.which("patch"), "需要系统patch命令")
+    def test_apply_patch_with_patch_command(self):
+        """测试超过阈值的文件交给系统patch命令，失败时原文件不变"""
+        async def run_test():
+            self.patch_applier.config.patch_shell_threshold = 0
+            os.chmod(self.file_path, 0o640)
+            new_content = self._modified()
+            patch = await self.patch_applier.create_patch(self.file_path, new_content)
+
+            bad = await self.patch_applier.apply_patch(self.file_path, patch.replace("-line 10", "-line x"))
+            self.assertFalse(bad["success"])
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), self.original)
+
+            result = await self.patch_applier.apply_patch(self.file_path, patch)
+
+            self.assertTrue(result["success"], result.get("error"))
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), new_content)
+            self.assertEqual(result["stats"], {"added": 2, "removed": 1, "modified": 1})
+            self.assertEqual(Path(result["backup_path"]).read_text(encoding="utf-8"), self.original)
+            self.assertEqual(os.stat(self.file_path).st_mode & 0o777, 0o640)
+            self.assertEqual(sorted(os.listdir(self.test_dir)), ["sample.py", "sample.py.bak"])
+
+        asyncio.run(run_test())
+
+    def test_apply_parsed_patch_multiple_hunks(self):
+        """测试多个块（含纯插入块）按原文件位置合并"""
+        chunks = self.patch_applier._parse_unified_diff(
+            "@@ -2,0 +3 @@\n+inserted\n"
+            "@@ -5,2 +6,1 @@\n-line 5\n line 6"
+        )
+        original = "\n".join(f"line {i}" for i in range(1, 8))
+
+        result = self.patch_applier._apply_parsed_patch(original, chunks)
+
+        self.assertEqual(
+            result.split("\n"),
+            ["line 1", "line 2", "inserted", "line 3", "line 4", "line 6", "line 7"]
+        )
+
+        # 重叠的块视为失败
+        overlapping = self.patch_applier._parse_unified_diff(
+            "@@ -2,2 +2,2 @@\n line 2\n-line 3\n+x\n"
+            "@@ -3,1 +3,1 @@\n-line 3\n+y"
+        )
+        self.assertIsNone(self.patch_applier._apply_parsed_patch(original, overlapping))
+
+    def test_preview_patch(self):
+        """测试预览补丁不修改文件"""
+        async def run_test():
+            patch = await self.patch_applier.create_patch(self.file_path, self._modified())
+
+            result = await self.patch_applier.preview_patch(self.file_path, patch)
+
+            self.assertTrue(result["success"])
+            self.assertIn("-line 10", result["preview"])
+            self.assertIn("+line ten", result["preview"])
+            self.assertIn("@@ -7,7 +7,8 @@", result["preview"])
+            self.assertEqual(result["stats"], {"added": 2, "removed": 1, "modified": 1})
+            self.assertTrue(result["preview"].startswith("--- 原文件\n+++ 修改后\n"))
+            self.assertEqual(self.file_path.read_text(encoding="utf-8"), self.original)
+
+        asyncio.run(run_test())
+
+    def test_unified_diff_matches_difflib(self):
+        """测试剥离首尾公共行后的差异与difflib一致（块头行号已平移）"""
+        original_lines = [f"line {i}" for i in range(1000)]
+        new_lines = list(original_lines)
+        new_lines[500] = "changed"
+        new_lines.insert(800, "inserted")
+
+        expected = list(difflib.unified_diff(original_lines, new_lines, 'a', 'b', lineterm=''))
+
+        self.assertEqual(_unified_diff(original_lines, new_lines, 'a', 'b'), expected)
+        self.assertEqual(_unified_diff(original_lines, original_lines), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
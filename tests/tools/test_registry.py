@@ -87,6 +87,18 @@ class MockAnotherTestTool(BaseTool[Dict[str, Any]]):
         )
 
 
+class MockClosableTool(MockTestTool):
+    """持有需要异步关闭的资源的测试用工具"""
+    
+    def __init__(self):
+        super().__init__()
+        self.name = "closable_tool"
+        self.closed = False
+    
+    async def close(self) -> None:
+        self.closed = True
+
+
 class InvalidTool:
     """无效的工具类（不继承BaseTool）"""
     pass
@@ -212,6 +224,17 @@ class TestToolRegistry(unittest.TestCase):
         instance3 = self.registry.get_tool_instance("nonexistent")
         self.assertIsNone(instance3)
     
+    def test_close_instances(self):
+        """测试关闭已创建实例持有的资源，没有异步close()的工具被跳过"""
+        self.registry.register_tool(MockTestTool)
+        self.registry.register_tool(MockClosableTool)
+        closable = self.registry.get_tool_instance("closable_tool")
+        self.registry.get_tool_instance("test_tool")
+        
+        asyncio.run(self.registry.close())
+        
+        self.assertTrue(closable.closed)
+    
     def test_create_tool_instance_new(self):
         """测试创建工具实例（每次新建）"""
         self.registry.register_tool(MockTestTool)
@@ -310,6 +333,26 @@ class TestToolRegistry(unittest.TestCase):
         self.assertEqual(len(enabled_dicts), 1)
         self.assertEqual(enabled_dicts[0]["id"], "test_tool")
     
+    def test_get_tools_dict_cache_invalidation(self):
+        """测试工具字典缓存在注册/注销/启用/禁用后失效"""
+        self.registry.register_tool(MockTestTool)
+        first = self.registry.get_tools_dict(enabled_only=True)
+        self.assertIs(self.registry.get_tools_dict(enabled_only=True), first)
+        
+        self.registry.register_tool(MockAnotherTestTool)
+        self.assertEqual([t["id"] for t in self.registry.get_tools_dict(enabled_only=True)],
+                         ["another_test", "test_tool"])
+        
+        self.registry.disable_tool("test_tool")
+        self.assertEqual([t["id"] for t in self.registry.get_tools_dict(enabled_only=True)], ["another_test"])
+        self.assertFalse(self.registry.get_tools_dict()[1]["enabled"])
+        
+        self.registry.enable_tool("test_tool")
+        self.assertEqual(len(self.registry.list_tools(enabled_only=True)), 2)
+        
+        self.registry.unregister_tool("another_test")
+        self.assertEqual([t["id"] for t in self.registry.get_tools_dict()], ["test_tool"])
+    
     def test_execute_tool(self):
         """测试执行工具"""
         async def run_test():
@@ -495,6 +538,31 @@ class TestToolRegistry(unittest.TestCase):
         self.assertEqual(tool_info.parameters, {"test": "params"})
         self.assertTrue(tool_info.enabled)
 
+    def test_tool_info_cached_per_class(self):
+        """测试工具信息按类缓存，重复注册不再创建实例"""
+        created = []
+
+        class CountingTool(MockTestTool):
+            def __init__(self):
+                super().__init__()
+                created.append(self)
+
+        class DynamicTool(CountingTool):
+            CACHE_TOOL_INFO = False
+
+        self.assertTrue(self.registry.register_tool(CountingTool))
+        self.assertTrue(ToolRegistry().register_tool(CountingTool))
+        self.assertTrue(self.registry.register_tool(CountingTool))
+        self.assertEqual(len(created), 1)
+        self.assertEqual(self.registry.get_tool_info("test_tool").description, "A test tool for unit testing")
+
+        self.registry.register_tool(DynamicTool)
+        self.registry.register_tool(DynamicTool)
+        self.assertEqual(len(created), 3)
+        self.assertNotIn(DynamicTool, ToolRegistry._TOOL_INFO_CACHE)
+
+        del ToolRegistry._TOOL_INFO_CACHE[CountingTool]
+
 
 if __name__ == "__main__":
     unittest.main()
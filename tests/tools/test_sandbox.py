@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""SandboxExecutor 单元测试"""
+
+import unittest
+import asyncio
+import gc
+import os
+import tempfile
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加src目录到路径
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from tools.sandbox import SandboxExecutor, _check_command
+
+
+class TestSandboxExecutor(unittest.TestCase):
+    """SandboxExecutor 测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.test_dir = tempfile.mkdtemp()
+        self.executors = []
+
+    def tearDown(self):
+        """测试后清理"""
+        for executor in self.executors:
+            executor.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _executor(self, sandbox_policy: str) -> SandboxExecutor:
+        executor = SandboxExecutor(SimpleNamespace(cwd=Path(self.test_dir), sandbox_policy=sandbox_policy))
+        self.executors.append(executor)
+        return executor
+
+    def test_temp_dir_cleanup(self):
+        """测试close()和实例回收都会清理临时目录"""
+        executor = self._executor("workspace_write")
+        temp_dir = executor.temp_dir
+        self.assertTrue(temp_dir.exists())
+        executor.close()
+        executor.close()
+        self.assertFalse(temp_dir.exists())
+
+        executor = SandboxExecutor(SimpleNamespace(cwd=Path(self.test_dir), sandbox_policy="workspace_write"))
+        temp_dir = executor.temp_dir
+        del executor
+        gc.collect()
+        self.assertFalse(temp_dir.exists())
+
+    def test_is_command_allowed(self):
+        """测试危险命令和只读模式下的网络命令被拒绝"""
+        executor = self._executor("workspace_write")
+
+        self.assertEqual(executor.is_command_allowed("ls -la"), (True, None))
+        self.assertEqual(executor.is_command_allowed("sudo RM -RF / --no-preserve-root"), (False, "禁止删除根目录"))
+        self.assertEqual(executor.is_command_allowed("echo hi && chmod 777 x"), (False, "禁止设置777权限"))
+        self.assertEqual(executor.is_command_allowed("curl http://example.com"), (True, None))
+
+        read_only = self._executor("strict")
+        self.assertEqual(
+            read_only.is_command_allowed("cd repo && GIT Push origin main"),
+            (False, "只读模式下禁止网络操作: git push")
+        )
+        self.assertFalse(read_only.is_command_allowed("mkfs.ext4 /dev/sda")[0])
+        # 只做ASCII大小写折叠，与str.lower()后的子串匹配一致
+        self.assertEqual(read_only.is_command_allowed("echo \u017fsh"), (True, None))
+
+        full_access = self._executor("none")
+        self.assertEqual(full_access.is_command_allowed("rm -rf /"), (True, None))
+
+    def test_command_check_cached_per_policy(self):
+        """测试命令检查结果按(命令, 是否只读)缓存"""
+        _check_command.cache_clear()
+        workspace = self._executor("workspace_write")
+        read_only = self._executor("strict")
+
+        self.assertTrue(workspace.is_command_allowed("wget example.com")[0])
+        self.assertFalse(read_only.is_command_allowed("wget example.com")[0])
+        self.assertTrue(workspace.is_command_allowed("wget example.com")[0])
+
+        info = _check_command.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 2))
+
+    def test_execute_command_concurrency_limited(self):
+        """测试同时运行的命令数不超过max_concurrent_sandbox"""
+        async def run_test():
+            executor = SandboxExecutor(SimpleNamespace(
+                cwd=Path(self.test_dir), sandbox_policy="workspace_write", max_concurrent_sandbox=2
+            ))
+            self.executors.append(executor)
+            running = 0
+            peak = 0
+            original = executor._execute_unix
+
+            async def tracking(*args):
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                try:
+                    return await original(*args)
+                finally:
+                    running -= 1
+
+            executor._execute_unix = tracking
+            results = await asyncio.gather(*(
+                executor.execute_command("sleep 0.05 && echo ok") for _ in range(6)
+            ))
+
+            self.assertTrue(all(r["success"] and r["stdout"] == "ok\n" for r in results))
+            self.assertEqual(peak, 2)
+
+        asyncio.run(run_test())
+
+    def test_execute_command_across_event_loops(self):
+        """测试同一执行器在多个事件循环中并发执行命令（并发限制按事件循环创建）"""
+        executor = SandboxExecutor(SimpleNamespace(
+            cwd=Path(self.test_dir), sandbox_policy="workspace_write", max_concurrent_sandbox=1
+        ))
+        self.executors.append(executor)
+
+        async def run_test():
+            return await asyncio.gather(*(
+                executor.execute_command("sleep 0.02 && echo ok") for _ in range(3)
+            ))
+
+        for _ in range(2):
+            results = asyncio.run(run_test())
+            self.assertTrue(all(r["success"] and r["stdout"] == "ok\n" for r in results), results)
+
+    def test_execute_command_env(self):
+        """测试子进程环境变量带有沙箱标记，并在多次执行间复用"""
+        async def run_test():
+            executor = self._executor("workspace_write")
+            env = executor._env
+
+            first = await executor.execute_command("echo $CODEX_SANDBOX $CODEX_SANDBOX_NETWORK_DISABLED")
+            await executor.execute_command("true")
+
+            self.assertEqual(first["stdout"], "python 1\n")
+            self.assertIs(executor._env, env)
+            self.assertNotIn("CODEX_SANDBOX", os.environ)
+            self.assertNotIn("CODEX_SANDBOX_NETWORK_DISABLED", self._executor("none")._env)
+
+        asyncio.run(run_test())
+
+
+if __name__ == "__main__":
+    unittest.main()
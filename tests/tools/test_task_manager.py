@@ -2,6 +2,7 @@
 """TaskManager 单元测试（仅会话记录）"""
 
 import unittest
+from unittest.mock import patch
 import sys
 import os
 from datetime import datetime
@@ -9,7 +10,7 @@ from datetime import datetime
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 
-from tools.task_manager import TaskManager, SubagentSession
+from tools.task_manager import TaskManager, SubagentSession, get_task_manager
 
 
 class TestSubagentSession(unittest.TestCase):
@@ -70,6 +71,21 @@ class TestTaskManager(unittest.TestCase):
         manager2 = TaskManager()
         
         self.assertIs(manager1, manager2)
+        self.assertIs(get_task_manager(), manager1)
+    
+    def test_singleton_thread_safe(self):
+        """测试多线程同时首次创建时只产生一个实例"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        original = TaskManager._instance
+        TaskManager._instance = None
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                managers = list(pool.map(lambda _: get_task_manager(), range(32)))
+            self.assertTrue(all(m is managers[0] for m in managers))
+            self.assertEqual(managers[0].list_sessions(), [])
+        finally:
+            TaskManager._instance = original
     
     def test_create_session(self):
         """测试创建会话"""
@@ -216,6 +232,25 @@ class TestTaskManager(unittest.TestCase):
         # 清空后应该没有会话
         self.assertEqual(len(self.manager.list_sessions()), 0)
 
+    
+    def test_session_eviction(self):
+        """测试超出上限时优先淘汰最久未访问的已结束会话"""
+        with patch("tools.task_manager.MAX_SESSIONS", 3):
+            running = self.manager.create_session("p", "general", "运行中")
+            done1 = self.manager.create_session("p", "general", "完成1")
+            done2 = self.manager.create_session("p", "general", "完成2")
+            self.manager.update_session_status(done1.id, "completed")
+            self.manager.update_session_status(done2.id, "failed")
+            
+            # 访问 done1 使其成为最近使用
+            self.manager.get_session(done1.id)
+            self.manager.create_session("p", "general", "新任务")
+            
+            self.assertIsNotNone(self.manager.get_session(running.id))
+            self.assertIsNotNone(self.manager.get_session(done1.id))
+            self.assertIsNone(self.manager.get_session(done2.id))
+            self.assertEqual(len(self.manager.list_sessions()), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -13,6 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../src"))
 from tools.task_tool import TaskTool
 from tools.task_manager import TaskManager
 from tools.base_tool import ToolContext
+from core.agents import AgentInfo
 
 
 class TestTaskTool(unittest.TestCase):
@@ -35,6 +36,28 @@ class TestTaskTool(unittest.TestCase):
         # plan 是 primary agent，不应作为 task subagent 出现
         self.assertNotIn("plan", enum_values)
 
+    def test_schema_and_description_cached_until_subagents_change(self):
+        schema = self.task_tool.get_parameters_schema()
+        self.assertIs(self.task_tool.get_parameters_schema(), schema)
+        self.assertEqual(TaskTool().description, self.task_tool.description)
+
+        registry = self.task_tool.agent_registry
+        registry.register(AgentInfo(
+            name="reviewer",
+            description="代码审查子代理",
+            mode="subagent",
+            allowed_tools=["read"],
+            native=False,
+        ))
+        try:
+            refreshed = self.task_tool.get_parameters_schema()
+            self.assertIn("reviewer", refreshed["properties"]["subagent_type"]["enum"])
+            self.assertIn("- reviewer: 代码审查子代理", TaskTool().description)
+        finally:
+            registry.remove("reviewer")
+
+        self.assertNotIn("reviewer", self.task_tool.get_parameters_schema()["properties"]["subagent_type"]["enum"])
+
     def test_unknown_subagent_type_error(self):
         async def run_test():
             result = await self.task_tool.execute(
@@ -14,11 +14,13 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
 try:
     from tools.todo import TodoWriteTool, TodoReadTool, TodoState, TodoInfo
     from tools.base_tool import ToolContext
+    from tools import todo as todo_module
 except ImportError:
     # 尝试相对导入
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
     from tools.todo import TodoWriteTool, TodoReadTool, TodoState, TodoInfo
     from tools.base_tool import ToolContext
+    from tools import todo as todo_module
 
 
 class TestTodoTools(unittest.TestCase):
@@ -221,6 +223,11 @@ class TestTodoTools(unittest.TestCase):
         self.assertEqual(read_schema["type"], "object")
         self.assertEqual(len(read_schema["properties"]), 0)
         self.assertEqual(len(read_schema["required"]), 0)
+        
+        # 参数模式预先构建，多次调用返回同一对象
+        self.assertIs(self.write_tool.get_parameters_schema(), write_schema)
+        self.assertIs(TodoWriteTool().get_parameters_schema(), write_schema)
+        self.assertIs(self.read_tool.get_parameters_schema(), read_schema)
     
     def test_tool_basic_properties(self):
         """测试工具基本属性"""
@@ -255,6 +262,43 @@ class TestTodoTools(unittest.TestCase):
                 self.fail("输出不是有效的 JSON 格式")
         
         asyncio.run(run_test())
+    
+    def test_todo_info_to_dict(self):
+        """测试 to_dict 与 dataclasses.asdict 结果一致"""
+        from dataclasses import asdict
+        todo = TodoInfo(content="任务", status="pending", id="1")
+        
+        self.assertEqual(todo.to_dict(), asdict(todo))
+    
+    def test_todo_metadata_is_a_copy(self):
+        """测试修改返回的元数据不影响保存的待办事项"""
+        async def run_test():
+            result = await self.write_tool.execute(
+                {"todos": [{"id": "1", "status": "pending", "content": "任务"}]}, self.context
+            )
+            result.metadata["todos"][0]["status"] = "completed"
+            result.metadata["todos"].clear()
+            
+            read = await self.read_tool.execute({}, self.context)
+            read.metadata["todos"][0]["content"] = "改动"
+            
+            stored = TodoState().get_todos(self.context.session_id)
+            self.assertEqual(stored, [TodoInfo(content="任务", status="pending", id="1")])
+        
+        asyncio.run(run_test())
+    
+    def test_dumps_matches_stdlib_json(self):
+        """测试序列化结果与 json.dumps(indent=2, ensure_ascii=False) 一致（无论是否安装 orjson）"""
+        data = [
+            {"id": "1", "content": "引号\"与换行\n", "status": "pending", "priority": None},
+            {"id": "2", "content": "task", "status": "completed", "priority": "low"},
+        ]
+        expected = json.dumps(data, indent=2, ensure_ascii=False)
+        
+        self.assertEqual(todo_module._dumps(data), expected)
+        self.assertEqual(todo_module._dumps([]), "[]")
+        with patch.object(todo_module, "orjson", None):
+            self.assertEqual(todo_module._dumps(data), expected)
 
 
 class TestTodoState(unittest.TestCase):
@@ -275,9 +319,11 @@ class TestTodoState(unittest.TestCase):
         retrieved_todos = state2.get_todos("test_session")
         self.assertEqual(len(retrieved_todos), 1)
         self.assertEqual(retrieved_todos[0].content, "测试")
+        self.assertEqual(state2.get_active_count("test_session"), 1)
         
         # 清理
         TodoState()._todos.clear()
+        self.assertEqual(state1.get_active_count("test_session"), 0)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,11 @@
 
 import unittest
 import asyncio
+import gc
+import threading
 import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock, patch, AsyncMock
 import aiohttp
 
@@ -21,6 +25,43 @@ except ImportError:
     from tools.base_tool import ToolContext
 
 
+def _mock_body(*chunks):
+    """构造按块返回响应体的 response.content"""
+    async def iter_chunked(size):
+        for chunk in chunks:
+            yield chunk
+    
+    content = Mock()
+    content.iter_chunked = Mock(side_effect=iter_chunked)
+    return content
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """返回固定页面并保持连接的 HTTP/1.1 处理器"""
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        body = b"<p>ok</p>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def _mock_response(status=200, headers=None, body=b''):
+    """构造 aiohttp 响应对象"""
+    response = AsyncMock()
+    response.ok = status < 400
+    response.status = status
+    response.headers = headers or {}
+    response.content = _mock_body(body)
+    return response
+
+
 class TestWebFetchTool(unittest.TestCase):
     """WebFetchTool 测试类"""
     
@@ -101,6 +142,18 @@ class TestWebFetchTool(unittest.TestCase):
         self.assertIn("Another text block.", text)
         self.assertNotIn("console.log", text)
         self.assertNotIn("color: red", text)
+        # 空白已合并为单个空格
+        self.assertEqual(text, "Test Page Main Title This is a paragraph. Another text block.")
+    
+    def test_extract_text_parser_fallback(self):
+        """测试未安装 lxml 时回退到 html.parser，提取结果一致"""
+        html = "<html><body><h1>Title</h1><script>x = 1;</script><p>Body  text</p></body></html>"
+        text = self.web_fetch_tool._extract_text_from_html(html)
+        
+        with patch('tools.web_tools._HTML_PARSER', 'html.parser'):
+            self.assertEqual(self.web_fetch_tool._extract_text_from_html(html), text)
+        self.assertIn("Title", text)
+        self.assertNotIn("x = 1", text)
     
     def test_convert_html_to_markdown(self):
         """测试 HTML 到 Markdown 转换"""
@@ -136,7 +189,7 @@ class TestWebFetchTool(unittest.TestCase):
         
         # 测试缓存过期
         # 修改缓存时间戳使其过期
-        tool._cache[url] = (content, time.time() - tool.CACHE_DURATION - 1)
+        tool._cache[url].timestamp = time.time() - tool.CACHE_DURATION - 1
         cached_content = tool._get_from_cache(url)
         self.assertIsNone(cached_content)
     
@@ -146,8 +199,9 @@ class TestWebFetchTool(unittest.TestCase):
         
         # 添加过期的缓存项
         old_time = time.time() - tool.CACHE_DURATION - 1
-        tool._cache["old_url"] = ("old_content", old_time)
-        tool._cache["new_url"] = ("new_content", time.time())
+        tool._set_cache("old_url", "old_content")
+        tool._cache["old_url"].timestamp = old_time
+        tool._set_cache("new_url", "new_content")
         
         # 清理缓存
         tool._clean_cache()
@@ -155,6 +209,34 @@ class TestWebFetchTool(unittest.TestCase):
         self.assertNotIn("old_url", tool._cache)
         self.assertIn("new_url", tool._cache)
     
+    def test_cache_bounded(self):
+        """测试缓存条目数和单条内容大小受限"""
+        tool = self.web_fetch_tool
+        
+        with patch.object(WebFetchTool, 'MAX_CACHE_ENTRIES', 3):
+            for i in range(5):
+                tool._set_cache(f"url{i}", f"content{i}")
+        self.assertEqual(list(tool._cache), ["url2", "url3", "url4"])
+        
+        with patch.object(WebFetchTool, 'MAX_CACHED_BYTES', 10):
+            tool._set_cache("url4", "x" * 11)
+        self.assertNotIn("url4", tool._cache)
+        self.assertIsNone(tool._get_from_cache("url4"))
+    
+    def test_cache_rewrite_moves_to_end(self):
+        """测试重新写入的缓存条目不会因旧的写入顺序被提前清理"""
+        tool = self.web_fetch_tool
+        
+        tool._set_cache("a", "first")
+        tool._set_cache("b", "second")
+        tool._set_cache("a", "refreshed")
+        self.assertEqual(list(tool._cache), ["b", "a"])
+        
+        # 最早的条目过期后被清理，较新的条目保留
+        tool._cache["b"].timestamp = time.time() - tool.CACHE_DURATION - 1
+        self.assertEqual(tool._get_from_cache("a"), "refreshed")
+        self.assertNotIn("b", tool._cache)
+    
     @patch('aiohttp.ClientSession.get')
     def test_fetch_content_success(self, mock_get):
         """测试成功获取内容"""
@@ -167,7 +249,7 @@ class TestWebFetchTool(unittest.TestCase):
                 'content-type': 'text/html; charset=utf-8',
                 'content-length': '100'
             }
-            mock_response.read.return_value = b'<html><body>Test</body></html>'
+            mock_response.content = _mock_body(b'<html><body>', b'Test</body></html>')
             
             mock_get.return_value.__aenter__.return_value = mock_response
             
@@ -177,6 +259,94 @@ class TestWebFetchTool(unittest.TestCase):
             
             self.assertEqual(content, '<html><body>Test</body></html>')
             self.assertEqual(content_type, 'text/html; charset=utf-8')
+            await self.web_fetch_tool.close()
+        
+        asyncio.run(run_test())
+    
+    @patch('aiohttp.ClientSession.get')
+    def test_fetch_content_charset(self, mock_get):
+        """测试按 Content-Type 中的字符集解码"""
+        async def run_test():
+            cases = [
+                ('text/html; charset=GBK', '中文'.encode('gbk'), '中文'),
+                ('text/html; Charset="utf-8"', '中文'.encode('utf-8') + b'\xff', '中文'),
+                ('text/html; charset=unknown-charset', b'plain', 'plain'),
+                ('text/html', 'é'.encode('utf-8'), 'é'),
+            ]
+            for content_type, body, expected in cases:
+                mock_get.return_value.__aenter__.return_value = _mock_response(
+                    headers={'content-type': content_type}, body=body
+                )
+                content, _ = await self.web_fetch_tool._fetch_content("https://example.com", 30)
+                self.assertEqual(content, expected, content_type)
+            await self.web_fetch_tool.close()
+        
+        asyncio.run(run_test())
+    
+    @patch('aiohttp.ClientSession.get')
+    def test_fetch_content_too_large(self, mock_get):
+        """测试响应体超过上限时中止读取（即使没有 content-length）"""
+        async def run_test():
+            mock_response = AsyncMock()
+            mock_response.ok = True
+            mock_response.status = 200
+            mock_response.headers = {'content-type': 'text/html'}
+            chunk = b'x' * self.web_fetch_tool.READ_CHUNK_SIZE
+            chunks = [chunk] * (self.web_fetch_tool.MAX_RESPONSE_SIZE // len(chunk) + 10)
+            read = []
+            
+            async def iter_chunked(size):
+                for c in chunks:
+                    read.append(c)
+                    yield c
+            
+            mock_response.content = Mock()
+            mock_response.content.iter_chunked = Mock(side_effect=iter_chunked)
+            mock_get.return_value.__aenter__.return_value = mock_response
+            
+            with self.assertRaises(ValueError):
+                await self.web_fetch_tool._fetch_content("https://example.com", 30)
+            self.assertLess(len(read), len(chunks))
+            await self.web_fetch_tool.close()
+        
+        asyncio.run(run_test())
+    
+    def test_fetch_concurrency_limited(self):
+        """测试同时进行的请求数受全局和单个主机的上限限制"""
+        from collections import Counter
+        
+        async def run_test():
+            tool = self.web_fetch_tool
+            running = Counter()
+            peaks = Counter()
+            
+            class SlowResponse:
+                def __init__(self, url):
+                    self.host = url.split('/')[2]
+                
+                async def __aenter__(self):
+                    running[self.host] += 1
+                    running['total'] += 1
+                    peaks[self.host] = max(peaks[self.host], running[self.host])
+                    peaks['total'] = max(peaks['total'], running['total'])
+                    await asyncio.sleep(0.01)
+                    return _mock_response(headers={'content-type': 'text/plain'}, body=b'ok')
+                
+                async def __aexit__(self, *exc):
+                    running[self.host] -= 1
+                    running['total'] -= 1
+            
+            with patch.object(WebFetchTool, 'MAX_CONCURRENT_FETCHES', 3), \
+                    patch.object(WebFetchTool, 'MAX_FETCHES_PER_HOST', 2), \
+                    patch('aiohttp.ClientSession.get', side_effect=lambda url, **kw: SlowResponse(url)):
+                urls = [f"https://{host}/{i}" for host in ("a.com", "b.com") for i in range(4)]
+                results = await asyncio.gather(*(tool._fetch_content(url, 30) for url in urls))
+            
+            self.assertTrue(all(content == "ok" for content, _ in results))
+            self.assertEqual(peaks['total'], 3)
+            self.assertLessEqual(peaks['a.com'], 2)
+            self.assertLessEqual(peaks['b.com'], 2)
+            await tool.close()
         
         asyncio.run(run_test())
     
@@ -195,9 +365,60 @@ class TestWebFetchTool(unittest.TestCase):
             
             with self.assertRaises(aiohttp.ClientResponseError):
                 await self.web_fetch_tool._fetch_content("https://example.com", 30)
+            await self.web_fetch_tool.close()
         
         asyncio.run(run_test())
     
+    def test_session_reused(self):
+        """测试同一事件循环内复用 HTTP 会话，新的事件循环中重新创建"""
+        tool = self.web_fetch_tool
+        
+        async def get_sessions():
+            first = await tool._get_session()
+            second = await tool._get_session()
+            self.assertIs(first, second)
+            # 创建会话不启动后台任务
+            self.assertEqual(asyncio.all_tasks(), {asyncio.current_task()})
+            return first
+        
+        first = asyncio.run(get_sessions())
+        
+        async def run_test():
+            session = await tool._get_session()
+            self.assertIsNot(session, first)
+            await tool.close()
+            await tool.close()
+            self.assertTrue(session.closed)
+            self.assertIsNone(tool._session)
+        
+        asyncio.run(run_test())
+    
+    def test_close_releases_session(self):
+        """测试在各事件循环结束前调用 close() 后不产生未关闭资源的警告"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        tool = WebFetchTool()
+        
+        async def fetch():
+            session = await tool._get_session()
+            async with session.get(url) as response:
+                await response.read()
+            await tool.close()
+            return session
+        
+        with warnings.catch_warnings(record=True) as caught, self.assertNoLogs("asyncio"):
+            warnings.simplefilter("always")
+            sessions = [asyncio.run(fetch()), asyncio.run(fetch())]
+            self.assertIsNot(sessions[0], sessions[1])
+            self.assertTrue(all(session.closed for session in sessions))
+            del tool, sessions
+            gc.collect()
+        
+        self.assertEqual([w for w in caught if issubclass(w.category, ResourceWarning)], [])
+    
     def test_invalid_url_error(self):
         """测试无效 URL 错误"""
         async def run_test():
@@ -252,6 +473,33 @@ class TestWebFetchTool(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    @patch('tools.web_tools.WebFetchTool._fetch_content')
+    def test_html_conversion_runs_off_event_loop(self, mock_fetch):
+        """测试 HTML 解析在线程中执行，不阻塞事件循环"""
+        import threading
+        
+        async def run_test():
+            mock_fetch.return_value = ('<html><body><p>Content</p></body></html>', 'text/html')
+            loop_thread = threading.get_ident()
+            threads = []
+            original = self.web_fetch_tool._convert_html_to_markdown
+            
+            def tracking(html):
+                threads.append(threading.get_ident())
+                return original(html)
+            
+            self.web_fetch_tool._convert_html_to_markdown = tracking
+            result = await self.web_fetch_tool.execute({
+                "url": "https://example.com",
+                "format": "markdown"
+            }, self.context)
+            
+            self.assertIn("Content", result.output)
+            self.assertEqual(len(threads), 1)
+            self.assertNotEqual(threads[0], loop_thread)
+        
+        asyncio.run(run_test())
+    
     @patch('tools.web_tools.WebFetchTool._fetch_content')
     def test_successful_execution_html_format(self, mock_fetch):
         """测试成功执行 - HTML 格式"""
@@ -285,12 +533,14 @@ class TestWebFetchTool(unittest.TestCase):
         
         asyncio.run(run_test())
     
-    @patch('tools.web_tools.WebFetchTool._fetch_content')
-    def test_cache_usage(self, mock_fetch):
+    @patch('aiohttp.ClientSession.get')
+    def test_cache_usage(self, mock_get):
         """测试缓存使用"""
         async def run_test():
-            html_content = '<html><body>Cached Content</body></html>'
-            mock_fetch.return_value = (html_content, 'text/html')
+            mock_get.return_value.__aenter__.return_value = _mock_response(
+                headers={'content-type': 'text/html'},
+                body=b'<html><body>Cached Content</body></html>'
+            )
             
             # 第一次调用
             result1 = await self.web_fetch_tool.execute({
@@ -304,9 +554,88 @@ class TestWebFetchTool(unittest.TestCase):
                 "format": "text"
             }, self.context)
             
-            # 验证只调用了一次 fetch_content
-            self.assertEqual(mock_fetch.call_count, 1)
+            # 验证只发出了一次请求
+            self.assertEqual(mock_get.call_count, 1)
+            self.assertFalse(result1.metadata["cached"])
             self.assertTrue(result2.metadata["cached"])
+            self.assertEqual(result2.output, "Cached Content")
+            await self.web_fetch_tool.close()
+        
+        asyncio.run(run_test())
+    
+    @patch('aiohttp.ClientSession.get')
+    def test_conditional_get_revalidates_cache(self, mock_get):
+        """测试缓存过期后使用 ETag/Last-Modified 发送条件请求，304 时沿用缓存内容"""
+        async def run_test():
+            tool = self.web_fetch_tool
+            url = "https://example.com/data"
+            mock_get.return_value.__aenter__.return_value = _mock_response(
+                headers={
+                    'content-type': 'application/json',
+                    'etag': '"v1"',
+                    'last-modified': 'Wed, 21 Oct 2015 07:28:00 GMT'
+                },
+                body=b'{"v": 1}'
+            )
+            await tool.execute({"url": url, "format": "html"}, self.context)
+            
+            # 过期的条目带有验证器，清理时保留
+            tool._cache[url].timestamp = time.time() - tool.CACHE_DURATION - 1
+            tool._clean_cache()
+            self.assertIn(url, tool._cache)
+            
+            mock_get.return_value.__aenter__.return_value = _mock_response(status=304)
+            result = await tool.execute({"url": url, "format": "html"}, self.context)
+            
+            headers = mock_get.call_args.kwargs["headers"]
+            self.assertEqual(headers["If-None-Match"], '"v1"')
+            self.assertEqual(headers["If-Modified-Since"], 'Wed, 21 Oct 2015 07:28:00 GMT')
+            self.assertEqual(result.output, '{"v": 1}')
+            self.assertEqual(result.metadata["content_type"], "application/json")
+            # 验证后缓存时间刷新
+            self.assertEqual(tool._get_from_cache(url), '{"v": 1}')
+            await tool.close()
+        
+        asyncio.run(run_test())
+    
+    def test_concurrent_fetches_deduplicated(self):
+        """测试同一 URL 的并发请求只获取一次"""
+        async def run_test():
+            calls = []
+            
+            async def slow_fetch(url, timeout):
+                calls.append(url)
+                await asyncio.sleep(0.01)
+                return '<html><body>Shared</body></html>', 'text/html'
+            
+            with patch.object(self.web_fetch_tool, '_fetch_content', side_effect=slow_fetch):
+                results = await asyncio.gather(*(
+                    self.web_fetch_tool.execute({"url": "https://example.com", "format": "text"}, self.context)
+                    for _ in range(3)
+                ))
+            
+            self.assertEqual(calls, ["https://example.com"])
+            self.assertTrue(all(r.output == "Shared" for r in results))
+            self.assertEqual(self.web_fetch_tool._inflight, {})
+        
+        asyncio.run(run_test())
+    
+    def test_concurrent_fetch_error_shared(self):
+        """测试共用请求失败时每个调用方都收到错误"""
+        async def run_test():
+            async def failing_fetch(url, timeout):
+                await asyncio.sleep(0.01)
+                raise aiohttp.ClientError("boom")
+            
+            with patch.object(self.web_fetch_tool, '_fetch_content', side_effect=failing_fetch) as mock_fetch:
+                results = await asyncio.gather(*(
+                    self.web_fetch_tool.execute({"url": "https://example.com", "format": "text"}, self.context)
+                    for _ in range(2)
+                ))
+            
+            self.assertEqual(mock_fetch.call_count, 1)
+            self.assertTrue(all(r.metadata["error"] == "network_error" for r in results))
+            self.assertEqual(self.web_fetch_tool._inflight, {})
         
         asyncio.run(run_test())
     
@@ -540,6 +869,28 @@ class TestWebSearchTool(unittest.TestCase):
         
         asyncio.run(run_test())
     
+    @patch('tools.web_tools.DDGS')
+    def test_search_runs_off_event_loop(self, mock_ddgs_class):
+        """测试搜索在线程中执行，不阻塞事件循环"""
+        import threading
+        
+        async def run_test():
+            loop_thread = threading.get_ident()
+            threads = []
+            
+            def text(query, **kwargs):
+                threads.append(threading.get_ident())
+                return [{'title': 'T', 'href': 'https://example.com', 'body': 'B'}]
+            
+            mock_ddgs_class.return_value.__enter__.return_value.text.side_effect = text
+            result = await self.web_search_tool.execute({"query": "test query"}, self.context)
+            
+            self.assertEqual(result.metadata["results_count"], 1)
+            self.assertEqual(len(threads), 1)
+            self.assertNotEqual(threads[0], loop_thread)
+        
+        asyncio.run(run_test())
+    
     @patch('tools.web_tools.DDGS')
     def test_raw_results_limit(self, mock_ddgs_class):
         """测试原始结果限制"""
@@ -0,0 +1 @@
+"""Utils模块测试"""
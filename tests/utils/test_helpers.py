@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""helpers 单元测试"""
+
+import unittest
+
+# 添加项目根目录到路径
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from utils.helpers import safe_json_loads
+
+
+class TestSafeJsonLoads(unittest.TestCase):
+    """safe_json_loads 测试类"""
+    
+    def test_basic_values(self):
+        """测试常规 JSON 的解析结果"""
+        self.assertEqual(safe_json_loads('{"a": [1, 2.5, "x", null, true]}'),
+                         {"a": [1, 2.5, "x", None, True]})
+    
+    def test_big_integers_exact(self):
+        """测试超出64位的整数保持精确，不被转换为浮点数"""
+        self.assertEqual(safe_json_loads('{"id": 12345678901234567890}'), {"id": 12345678901234567890})
+        self.assertEqual(safe_json_loads('[-98765432109876543210]'), [-98765432109876543210])
+        self.assertEqual(safe_json_loads('9223372036854775807'), 9223372036854775807)
+    
+    def test_nan_and_invalid(self):
+        """测试标准库允许的 NaN 写法可以解析，无效输入返回默认值"""
+        self.assertNotEqual(safe_json_loads('NaN'), safe_json_loads('NaN'))
+        self.assertEqual(safe_json_loads('{bad', default={}), {})
+        self.assertIsNone(safe_json_loads(None))
+
+
+if __name__ == '__main__':
+    unittest.main()